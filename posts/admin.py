@@ -1,9 +1,20 @@
 from django.contrib import admin
 
 from .models import Follow, Post, Group, Comment
+from .search import get_backend
 
 
-class PostAdmin(admin.ModelAdmin):
+class IndexedSearchMixin:
+    """Поиск в админке по полнотекстовому индексу вместо LIKE."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ids = get_backend().match(self.model, search_term)
+        return queryset.filter(pk__in=ids), False
+
+
+class PostAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("text", "pub_date", "author", "group",)
     search_fields = ("text",)
     list_filter = ("pub_date",)
@@ -17,9 +28,9 @@ class GroupAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ("post", "text", "author", "created")
-    search_fields = ("text", "post")
+    search_fields = ("text",)
     list_filter = ("created",)
     empty_value_display = "-пусто-"
 
@@ -0,0 +1,203 @@
+"""
+JSON API лент для мобильных клиентов.
+
+Представления берут те же выборки, что и posts/views.py, и тот же кэш
+страниц лент. Страницы листаются курсором (?cursor=), ETag строится из
+версий лент в кэше и самой свежей даты выборки, Last-Modified — из этой
+даты. Если клиент прислал совпадающий If-None-Match или
+If-Modified-Since, ответ 304 отдаётся до выборки постов и сериализации.
+"""
+from calendar import timegm
+from functools import partial, wraps
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .cache import feed_version, follow_version, get_feed_page, make_key
+from .conditional import latest, newest
+from .counters import USER_FIELDS, counters_for
+from .feed import follow_feed, follow_feed_date
+from .models import Group, Post, User
+from .paginators import CursorPaginator
+
+PAGE_SIZE = 10
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def file_url(field):
+    return field.url if field else None
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': post.author.username,
+        'group': post.group and post.group.slug,
+        'image': file_url(post.image),
+        'thumbnail': file_url(post.thumbnail),
+        'comments': post.comments_count,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def serialize_group(group):
+    return {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+
+
+def serialize_page(page, serialize):
+    return {
+        'results': [serialize(item) for item in page.object_list],
+        'next': getattr(page, 'next_cursor', None),
+        'previous': getattr(page, 'previous_cursor', None),
+    }
+
+
+def respond(request, versions, date, build, private=False):
+    """
+    Ответ с ETag и Last-Modified. build() вызывается только если
+    клиентская копия устарела, поэтому 304 не трогает выборку.
+    """
+    etag = quote_etag(make_key(*versions, date))
+    last_modified = date and timegm(date.utctimetuple())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(build(), json_dumps_params=JSON_PARAMS)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Клиент хранит копию, но сверяет её с сервером перед каждым показом.
+    # Значение не True Django пишет как private=False, поэтому ключ
+    # передаётся только для личных лент.
+    patch_cache_control(
+        response, no_cache=True, **({'private': True} if private else {}))
+    if private:
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def feed_response(request, queryset, *parts, private=False, date=None,
+                  field='pub_date', pk='id'):
+    """
+    Лента постов; parts — ключ страницы в кэше, как у HTML-ленты. date —
+    функция, считающая Last-Modified дешевле, чем newest(queryset).
+    """
+    def build():
+        paginator = CursorPaginator(queryset, PAGE_SIZE, field=field, pk=pk)
+        page = get_feed_page(request, paginator, *parts)
+        return serialize_page(page, serialize_post)
+
+    date = date() if date else newest(queryset)
+    return respond(
+        request, (feed_version(), *parts), date, build, private=private)
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Нужно войти'}, status=401,
+                json_dumps_params=JSON_PARAMS)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_safe
+def posts(request):
+    return feed_response(request, Post.objects.for_feed(), 'index')
+
+
+@require_safe
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+    return respond(
+        request, (feed_version(), 'post', post.pk),
+        latest(post.pub_date, newest(post.comments, 'created')),
+        lambda: serialize_post(post))
+
+
+@require_safe
+def comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    queryset = post.comments.select_related('author')
+
+    def build():
+        paginator = CursorPaginator(queryset, PAGE_SIZE, field='created')
+        page = paginator.get_cursor_page(request.GET.get('cursor'))
+        return serialize_page(page, serialize_comment)
+
+    return respond(
+        request, (feed_version(), 'comments', post.pk),
+        newest(queryset, 'created'), build)
+
+
+@require_safe
+def groups(request):
+    def build():
+        return {'results': [
+            serialize_group(group) for group in Group.objects.order_by('title')
+        ]}
+
+    return respond(request, (feed_version(), 'groups'), None, build)
+
+
+@require_safe
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.for_feed(), 'group', group.pk)
+
+
+@require_safe
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    counters = counters_for(author)
+    values = {field: getattr(counters, field) for field in USER_FIELDS}
+
+    def build():
+        return {
+            'username': author.username,
+            'full_name': author.get_full_name(),
+            **values,
+        }
+
+    return respond(
+        request,
+        (feed_version(), 'profile', author.pk, author.get_full_name(),
+         *values.values()),
+        newest(author.posts.all()), build)
+
+
+@require_safe
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request, author.posts.for_feed(), 'profile', author.pk)
+
+
+@require_safe
+@api_login_required
+def follow(request):
+    user = request.user
+    return feed_response(
+        request, follow_feed(user).for_feed(),
+        'follow', user.pk, follow_version(user.pk), private=True,
+        date=partial(follow_feed_date, user), field='feed_date', pk='feed_id')
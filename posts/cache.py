@@ -0,0 +1,137 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from yatube.routers import reading_from_replicas
+
+FEED_VERSION_KEY = 'posts:feed_version'
+FOLLOW_VERSION_KEY = 'posts:follow_version:{}'
+PROFILE_VERSION_KEY = 'posts:profile_version:{}'
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Начальная версия берётся от времени, чтобы после вытеснения
+        # ключа не совпасть с версией, под которой уже лежат страницы.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def feed_version():
+    return get_version(FEED_VERSION_KEY)
+
+
+def bump_feed_version():
+    bump_version(FEED_VERSION_KEY)
+
+
+def follow_version(user_id):
+    return get_version(FOLLOW_VERSION_KEY.format(user_id))
+
+
+def bump_follow_version(user_id):
+    bump_version(FOLLOW_VERSION_KEY.format(user_id))
+
+
+def profile_version(user_id):
+    return get_version(PROFILE_VERSION_KEY.format(user_id))
+
+
+def bump_profile_version(user_id):
+    bump_version(PROFILE_VERSION_KEY.format(user_id))
+
+
+def make_key(*parts):
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return f'posts:{digest}'
+
+
+def remembered(compute, *parts):
+    """
+    compute() из кэша; в parts должны входить версии нужных лент.
+    Считается по основной базе, чтобы отставшая реплика не записала
+    под новой версией старые данные.
+    """
+    key = make_key('remembered', *parts)
+    cached = cache.get(key)
+    if cached is None:
+        # Кортеж, чтобы отличить закэшированный None от промаха.
+        with reading_from_replicas(False):
+            cached = (compute(),)
+        cache.set(key, cached, settings.FEED_CACHE_TIMEOUT)
+    return cached[0]
+
+
+def get_feed_page(request, paginator, *parts):
+    """
+    Страница ленты из кэша. Ключ собирается из версии ленты, частей
+    parts и номера страницы или курсора, поэтому запись в ленту
+    инвалидирует все страницы сразу. Срок FEED_CACHE_TIMEOUT нужен на
+    случай, когда новая версия не дошла до этого процесса.
+    """
+    number = request.GET.get('page')
+    cursor = request.GET.get('cursor')
+    key = make_key(feed_version(), *parts, number, cursor)
+    cached = cache.get(key)
+    if cached is not None:
+        page = paginator.build_page(*cached)
+    else:
+        # Страница ляжет под уже сменённую версию, поэтому читается из
+        # основной базы: реплика может ещё не видеть эту запись.
+        with reading_from_replicas(False):
+            page = paginator.get_page(number, cursor)
+            page.object_list = list(page.object_list)
+        cache.set(key, (
+            page.object_list,
+            page.number,
+            getattr(page, 'next_cursor', None),
+            getattr(page, 'previous_cursor', None),
+        ), settings.FEED_CACHE_TIMEOUT)
+    page.cache_key = key
+    page.cache_timeout = settings.FEED_CACHE_TIMEOUT
+    return page
+
+
+CARD_TIMEOUT = 60 * 60 * 24
+
+
+def card_key(post, user):
+    """
+    Ключ карточки поста. Штамп считается по всем данным, которые выводит
+    карточка, поэтому правка поста, новый комментарий, переименование
+    группы или автора сразу дают новый ключ, а старый истекает сам.
+    """
+    group = post.group
+    stamp = make_key(
+        post.text, post.pub_date, post.image.name, post.thumbnail.name,
+        post.image_variants, post.comments_count,
+        post.author.username,
+        group and group.slug, group and group.title,
+    )
+    is_author = user is not None and user.pk == post.author_id
+    return f'posts:card:{post.pk}:{stamp}:{int(is_author)}'
+
+
+def card_tags(posts):
+    """
+    Теги кэша страниц (yatube.page_cache) для карточек posts. Теги
+    list:* ставят сами ленты: они меняются, когда меняется состав ленты.
+    """
+    tags = set()
+    for post in posts:
+        tags.add(f'post:{post.pk}')
+        tags.add(f'author:{post.author_id}')
+        if post.group_id is not None:
+            tags.add(f'group:{post.group.slug}')
+    return tags
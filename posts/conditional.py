@@ -0,0 +1,138 @@
+"""
+Условные ответы для HTML-лент.
+
+Для каждой страницы до вызова представления считается «свежесть»:
+части ETag (версии лент в кэше, от которых зависит страница) и самая
+свежая дата её данных для Last-Modified. Страница зависит и от того,
+кто смотрит (меню, форма комментария, кнопка подписки), поэтому в ETag
+входит пользователь, а ответ несёт Vary: Cookie. Анонимные страницы
+помечаются public и с s-maxage их может отдавать кэш перед сайтом,
+страницы вошедших — только private.
+
+Даты из базы запоминаются в кэше под ключом с версиями лент, поэтому
+повторный запрос к неизменившейся ленте обходится без базы. Читаются
+они из основной базы, чтобы отставшая реплика не записала под новой
+версией старую дату.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache import (
+    feed_version, follow_version, make_key, profile_version, remembered)
+from .feed import follow_feed_date
+from .models import Group, Post, User
+
+
+def newest(queryset, field='pub_date'):
+    return queryset.order_by().aggregate(newest=Max(field))['newest']
+
+
+def latest(*dates):
+    return max(filter(None, dates), default=None)
+
+
+def single(queryset):
+    """Первая строка values_list() или Http404."""
+    rows = list(queryset.order_by()[:1])
+    if not rows:
+        raise Http404
+    return rows[0]
+
+
+def viewer(request):
+    return request.user.pk if request.user.is_authenticated else 'anon'
+
+
+def patch_feed_caching(request, response):
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=settings.FEED_SHARED_MAX_AGE)
+
+
+def conditional_page(freshness):
+    """
+    Оборачивает представление в condition() с ETag и Last-Modified из
+    freshness(request, *args, **kwargs) -> (части ETag, дата или None).
+    Свежесть считается один раз на запрос: condition() спрашивает ETag
+    и Last-Modified по отдельности.
+    """
+    def state(request, *args, **kwargs):
+        if not hasattr(request, 'freshness'):
+            request.freshness = freshness(request, *args, **kwargs)
+        return request.freshness
+
+    def etag(request, *args, **kwargs):
+        parts, date = state(request, *args, **kwargs)
+        return make_key(*parts, date, viewer(request))
+
+    def last_modified(request, *args, **kwargs):
+        return state(request, *args, **kwargs)[1]
+
+    def decorator(view):
+        conditional = condition(
+            etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_feed_caching(request, response)
+            return response
+        return wrapper
+    return decorator
+
+
+def index_freshness(request):
+    version = feed_version()
+    date = remembered(lambda: newest(Post.objects.all()), version, 'index')
+    return (version, 'index'), date
+
+
+def group_freshness(request, slug):
+    version = feed_version()
+    pk, date = remembered(
+        lambda: single(Group.objects.filter(slug=slug).annotate(
+            newest=Max('posts__pub_date')).values_list('pk', 'newest')),
+        version, 'group', slug)
+    return (version, 'group', pk), date
+
+
+def profile_freshness(request, username):
+    version = feed_version()
+    pk, date = remembered(
+        lambda: single(User.objects.filter(username=username).annotate(
+            newest=Max('posts__pub_date')).values_list('pk', 'newest')),
+        version, 'profile', username)
+    parts = (version, 'profile', pk, profile_version(pk))
+    if request.user.is_authenticated:
+        # Кнопка «Подписаться» зависит от подписок смотрящего.
+        parts += (follow_version(request.user.pk),)
+    return parts, date
+
+
+def post_freshness(request, username, post_id):
+    version = feed_version()
+    author_id, pub_date, commented = remembered(
+        lambda: single(Post.objects.filter(
+            id=post_id, author__username=username).annotate(
+                newest=Max('comments__created')).values_list(
+                    'author_id', 'pub_date', 'newest')),
+        version, 'post', username, post_id)
+    parts = (version, 'post', post_id, profile_version(author_id))
+    return parts, latest(pub_date, commented)
+
+
+def follow_freshness(request):
+    user = request.user
+    parts = (feed_version(), 'follow', user.pk, follow_version(user.pk))
+    date = remembered(lambda: follow_feed_date(user), *parts)
+    return parts, date
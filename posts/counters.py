@@ -0,0 +1,130 @@
+from contextvars import ContextVar
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserCounters
+
+USER_FIELDS = ('followers_count', 'following_count', 'posts_count')
+
+# Пользователи, чьё удаление сейчас идёт: каскад удаляет их посты и
+# подписки, и сигналы этих строк не должны трогать их счётчики.
+_deleting = ContextVar('deleting_users', default=frozenset())
+
+
+def count_of(model, field):
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def with_actual_counts(users):
+    """Аннотирует пользователей счётчиками, посчитанными по таблицам."""
+    return users.annotate(
+        actual_followers_count=count_of(Follow, 'author'),
+        actual_following_count=count_of(Follow, 'user'),
+        actual_posts_count=count_of(Post, 'author'),
+    )
+
+
+def actual_values(user):
+    return {field: getattr(user, f'actual_{field}') for field in USER_FIELDS}
+
+
+def recount(user_id):
+    user = with_actual_counts(User.objects.filter(pk=user_id)).get()
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id, defaults=actual_values(user))
+    return counters
+
+
+def counters_for(user):
+    try:
+        return UserCounters.objects.get(user_id=user.pk)
+    except UserCounters.DoesNotExist:
+        return recount(user.pk)
+
+
+def shifted(field, delta):
+    # Счётчик не уходит ниже нуля, даже если строка уже пересчитана
+    # после удаления, о котором сообщает сигнал.
+    return Greatest(F(field) + delta, 0)
+
+
+def is_deleting(user_id):
+    return user_id in _deleting.get()
+
+
+def deleting(user_id):
+    _deleting.set(_deleting.get() | {user_id})
+
+
+def deleted(user_id):
+    _deleting.set(_deleting.get() - {user_id})
+    UserCounters.objects.filter(user_id=user_id).delete()
+
+
+def bump(user_id, **deltas):
+    if is_deleting(user_id):
+        return
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{field: shifted(field, delta) for field, delta in deltas.items()})
+    if not updated:
+        # Строки ещё нет: считаем её целиком, изменение уже в базе.
+        recount(user_id)
+
+
+def bump_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=shifted('comments_count', delta))
+
+
+def repair_posts(batch_size, posts=None):
+    """Исправляет расхождения Post.comments_count, возвращает их число."""
+    if posts is None:
+        posts = Post.objects.all()
+    drifted = posts.annotate(
+        actual=count_of(Comment, 'post')
+    ).exclude(
+        comments_count=F('actual')
+    ).only('id', 'comments_count')
+    fixed = 0
+    batch = []
+    for post in drifted.iterator(chunk_size=batch_size):
+        post.comments_count = post.actual
+        batch.append(post)
+        if len(batch) == batch_size:
+            Post.objects.bulk_update(batch, ('comments_count',))
+            fixed += len(batch)
+            batch = []
+    Post.objects.bulk_update(batch, ('comments_count',))
+    return fixed + len(batch)
+
+
+def repair_users(batch_size, users=None):
+    """Исправляет и создаёт недостающие UserCounters, возвращает их число."""
+    if users is None:
+        users = User.objects.all()
+    users = with_actual_counts(users.select_related('counters'))
+    fixed = 0
+    changed, created = [], []
+    for user in users.iterator(chunk_size=batch_size):
+        values = actual_values(user)
+        counters = getattr(user, 'counters', None)
+        if counters is None:
+            created.append(UserCounters(user_id=user.pk, **values))
+        elif any(getattr(counters, k) != v for k, v in values.items()):
+            for field, value in values.items():
+                setattr(counters, field, value)
+            changed.append(counters)
+        if len(changed) + len(created) >= batch_size:
+            fixed += flush_users(changed, created)
+            changed, created = [], []
+    return fixed + flush_users(changed, created)
+
+
+def flush_users(changed, created):
+    UserCounters.objects.bulk_create(created)
+    UserCounters.objects.bulk_update(changed, USER_FIELDS)
+    return len(changed) + len(created)
@@ -0,0 +1,143 @@
+from django.conf import settings
+from django.db.models import F, Max, Q
+
+from . import cache
+from .counters import counters_for, is_deleting
+from .models import FeedEntry, Follow, Post
+
+BATCH_SIZE = 500
+
+
+def is_pulled(author):
+    """
+    Посты авторов с большим числом подписчиков не раскладываются по
+    лентам при записи, а подмешиваются в ленту при чтении.
+    """
+    limit = settings.FEED_FANOUT_LIMIT
+    return counters_for(author).followers_count >= limit
+
+
+def fill(entries):
+    """entries — пары (читатель, пост); пост с полями pk и pub_date."""
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=post.pk, pub_date=post.pub_date)
+         for user_id, post in entries),
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fan_out(post):
+    if is_pulled(post.author):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    fill((user_id, post) for user_id in followers.iterator())
+
+
+def fan_out_many(posts):
+    """fan_out() для пачки постов одним запросом подписчиков на пачку."""
+    authored = {}
+    for post in posts:
+        authored.setdefault(post.author_id, []).append(post)
+    followers = Follow.objects.filter(author_id__in=authored).exclude(
+        author__counters__followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).values_list('author_id', 'user_id')
+    fill((user_id, post)
+         for author_id, user_id in followers.iterator()
+         for post in authored[author_id])
+
+
+def backfill(user, author):
+    posts = author.posts.only('id', 'pub_date').order_by()
+    fill((user.pk, post) for post in posts.iterator())
+
+
+def trim(user, author):
+    FeedEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def followed(user, author):
+    """Новая подписка; счётчик подписчиков автора уже увеличен."""
+    followers = counters_for(author).followers_count
+    limit = settings.FEED_FANOUT_LIMIT
+    if followers == limit:
+        became_pulled(author)
+    elif followers < limit:
+        backfill(user, author)
+
+
+def unfollowed(user, author):
+    """Отписка; счётчик подписчиков автора уже уменьшен."""
+    trim(user, author)
+    if is_deleting(author.pk):
+        return
+    limit = settings.FEED_FANOUT_LIMIT
+    if counters_for(author).followers_count == limit - 1:
+        became_pushed(author)
+
+
+def became_pulled(author):
+    """
+    Автор дорос до FEED_FANOUT_LIMIT: его посты уходят из лент и
+    подмешиваются при чтении, а новые не раскладываются.
+    """
+    FeedEntry.objects.filter(post__author=author).delete()
+    # Списки «звёзд» у читателей запомнены под версией ленты.
+    cache.bump_feed_version()
+
+
+def became_pushed(author):
+    """
+    Автор опустился ниже FEED_FANOUT_LIMIT: все его посты, в том числе
+    написанные, пока он был «звездой», раскладываются по лентам.
+    """
+    posts = list(author.posts.only('id', 'pub_date').order_by())
+    users = Follow.objects.filter(
+        author=author).values_list('user_id', flat=True)
+    fill((user_id, post) for user_id in users.iterator() for post in posts)
+    cache.bump_feed_version()
+
+
+def pulled_authors(user):
+    """Авторы из подписок user, чьи посты подмешиваются при чтении."""
+    def compute():
+        return list(Follow.objects.filter(
+            user=user,
+            author__counters__followers_count__gte=settings.FEED_FANOUT_LIMIT
+        ).values_list('author_id', flat=True))
+    return cache.remembered(
+        compute, cache.feed_version(), 'pulled', user.pk,
+        cache.follow_version(user.pk))
+
+
+def follow_feed_date(user):
+    """Дата самого свежего поста ленты подписок."""
+    dates = [FeedEntry.objects.filter(user=user).aggregate(
+        newest=Max('pub_date'))['newest']]
+    pulled = pulled_authors(user)
+    if pulled:
+        dates.append(Post.objects.filter(author_id__in=pulled).aggregate(
+            newest=Max('pub_date'))['newest'])
+    return max(filter(None, dates), default=None)
+
+
+def follow_feed(user):
+    """
+    Лента подписок с полями feed_date и feed_id для CursorPaginator.
+
+    Обычно это один диапазон индекса FeedEntry (user, pub_date, post).
+    Если читатель подписан на «звёзд», их посты подмешиваются по индексу
+    автора, а сортировка идёт по самим постам.
+    """
+    pulled = pulled_authors(user)
+    if not pulled:
+        posts = Post.objects.filter(feed_entries__user=user).annotate(
+            feed_date=F('feed_entries__pub_date'),
+            feed_id=F('feed_entries__post_id'))
+    else:
+        entries = FeedEntry.objects.filter(user=user).values('post_id')
+        posts = Post.objects.filter(
+            Q(id__in=entries) | Q(author_id__in=pulled)
+        ).annotate(feed_date=F('pub_date'), feed_id=F('id'))
+    return posts.order_by('-feed_date', '-feed_id')
@@ -1,6 +1,7 @@
 from django import forms
 
 from .models import Post, Comment
+from .uploads import strip_metadata, too_large, validate_image
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +9,24 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, skipped_uploads=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.skipped_uploads = skipped_uploads
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Файл, брошенный при загрузке за размер, в files не попал.
+        for field in self.skipped_uploads:
+            self.add_error(field, too_large())
+        return cleaned_data
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if image and 'image' in self.changed_data:
+            validate_image(image)
+            image = strip_metadata(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,233 @@
+import json
+import platform
+import random
+import time
+import uuid
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.seed import WORDS, seed
+
+User = get_user_model()
+PERCENTILES = (50, 90, 95, 99)
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+    'search', 'new_post', 'add_comment',
+)
+
+
+def isolated_caches(cold):
+    """
+    Кэши на время замера. Прогон кладёт в кэш страницы и версии данных,
+    которые потом откатываются, поэтому пишет под своим KEY_PREFIX: сайт
+    на том же кэше их не увидит. С --cold кэш очищается перед каждым
+    запросом, а clear() общего кэша сбросил бы и записи сайта, поэтому
+    холодный прогон получает свой LocMemCache.
+    """
+    prefix = f'benchmark-{uuid.uuid4().hex}'
+    if cold:
+        return {
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'{prefix}-{alias}',
+            }
+            for alias in settings.CACHES
+        }
+    return {
+        alias: dict(config, KEY_PREFIX=prefix)
+        for alias, config in settings.CACHES.items()
+    }
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга, values отсортированы."""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными со степенным графом '
+        'подписок, гоняет представления posts через тестовый клиент и '
+        'печатает перцентили задержки, число запросов к базе и '
+        'пропускную способность в JSON. Все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=40000)
+        parser.add_argument(
+            '--follows', type=int, default=30,
+            help='На скольких авторов подписан каждый пользователь'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона популярности авторов'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Сколько замеряемых запросов на представление'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=10,
+            help='Сколько запросов сделать до замера'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом'
+        )
+        parser.add_argument(
+            '--views', nargs='+', choices=VIEWS, default=VIEWS)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результатов, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Прошлые результаты: печатает разницу с ними в stderr'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        caches = isolated_caches(options['cold'])
+        # Без DEBUG не подключается debug toolbar и замер ближе к
+        # боевому режиму; запросы считает CaptureQueriesContext.
+        with transaction.atomic(), override_settings(
+                DEBUG=False, CACHES=caches):
+            started = time.perf_counter()
+            self.data = seed(
+                users=options['users'], groups=options['groups'],
+                posts=options['posts'], comments=options['comments'],
+                follows=options['follows'], alpha=options['alpha'],
+                random_seed=options['seed'])
+            seeded = time.perf_counter() - started
+            self.clients = self.login(10)
+            results = {
+                name: self.measure(name, options)
+                for name in options['views']
+            }
+            transaction.set_rollback(True)
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'cache': caches['default'].get(
+                    'INNER_BACKEND', caches['default']['BACKEND']),
+                'seed_seconds': round(seeded, 2),
+                **{key: options[key] for key in (
+                    'users', 'groups', 'posts', 'comments', 'follows',
+                    'alpha', 'requests', 'warmup', 'cold', 'seed')},
+            },
+            'views': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(text)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text + '\n')
+        if options['baseline']:
+            self.compare(options['baseline'], results)
+
+    def login(self, count):
+        clients = []
+        users = self.data.users
+        for pk in self.rng.sample(users, min(count, len(users))):
+            client = Client()
+            client.force_login(User.objects.get(pk=pk))
+            clients.append(client)
+        return clients
+
+    def author(self):
+        return self.rng.choices(self.data.users, self.data.weights)[0]
+
+    def target(self, name):
+        """Клиент, метод, адрес и данные очередного запроса к name."""
+        rng = self.rng
+        client = rng.choice(self.clients)
+        if name in ('index', 'follow_index'):
+            return client, 'get', reverse(name), None
+        if name == 'group_posts':
+            slug = Group.objects.get(pk=rng.choice(self.data.groups)).slug
+            return client, 'get', reverse(name, args=(slug,)), None
+        if name == 'profile':
+            username = User.objects.get(pk=self.author()).username
+            return client, 'get', reverse(name, args=(username,)), None
+        if name == 'search':
+            return client, 'get', reverse(name), {'q': rng.choice(WORDS)}
+        if name == 'new_post':
+            text = ' '.join(rng.choices(WORDS, k=8))
+            return client, 'post', reverse(name), {'text': text}
+        post = Post.objects.select_related('author').get(
+            pk=rng.choice(self.data.posts))
+        args = (post.author.username, post.pk)
+        if name == 'post_view':
+            return client, 'get', reverse('post', args=args), None
+        text = ' '.join(rng.choices(WORDS, k=5))
+        return client, 'post', reverse(name, args=args), {'text': text}
+
+    def request(self, name, cold):
+        client, method, url, data = self.target(name)
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url}: {response.status_code}')
+        return elapsed, len(queries)
+
+    def measure(self, name, options):
+        for _ in range(options['warmup']):
+            self.request(name, options['cold'])
+        timings, counts = [], []
+        for _ in range(options['requests']):
+            elapsed, queries = self.request(name, options['cold'])
+            timings.append(elapsed * 1000)
+            counts.append(queries)
+        timings.sort()
+        total = sum(timings)
+        result = {
+            f'p{percent}_ms': round(percentile(timings, percent), 3)
+            for percent in PERCENTILES
+        }
+        result.update(
+            mean_ms=round(total / len(timings), 3),
+            max_ms=round(timings[-1], 3),
+            queries_mean=round(sum(counts) / len(counts), 2),
+            queries_max=max(counts),
+            throughput_rps=round(len(timings) / total * 1000, 1),
+        )
+        self.stderr.write(
+            f'{name}: p50 {result["p50_ms"]} мс, '
+            f'p95 {result["p95_ms"]} мс, '
+            f'запросов {result["queries_mean"]}'
+        )
+        return result
+
+    def compare(self, path, results):
+        with open(path, encoding='utf-8') as stream:
+            baseline = json.load(stream)['views']
+        for name, result in results.items():
+            old = baseline.get(name)
+            if old is None:
+                continue
+            changes = ', '.join(
+                f'{key} {old[key]} -> {result[key]}'
+                for key in ('p50_ms', 'p95_ms', 'queries_mean')
+            )
+            self.stderr.write(f'{name}: {changes}')
@@ -0,0 +1,92 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts.feed import follow_feed
+from posts.models import Comment, FeedEntry, Follow, Group, Post
+from posts.seed import seed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу тестовыми данными и печатает планы (EXPLAIN) и '
+        'время запросов лент без составных индексов и с ними. '
+        'Все изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Сколько раз выполнять каждый запрос для замера'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            queries = self.queries()
+            self.stdout.write('== Без составных индексов ==')
+            self.drop_indexes()
+            self.report(queries, options['repeat'])
+            self.create_indexes()
+            self.stdout.write('== С составными индексами ==')
+            self.report(queries, options['repeat'])
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        data = seed(
+            users=options['users'], groups=options['groups'],
+            posts=options['posts'], comments=options['comments'],
+            follows=options['follows'])
+        # Читатель — наименее популярный пользователь, автор — самый
+        # популярный, пост — из середины ленты.
+        self.reader = User.objects.get(pk=data.users[-1])
+        self.author = User.objects.get(pk=data.users[0])
+        self.group = Group.objects.get(pk=data.groups[0])
+        self.post = Post.objects.get(pk=data.posts[len(data.posts) // 2])
+
+    def queries(self):
+        feed = ('-pub_date', '-id')
+        return {
+            'index': Post.objects.for_feed().order_by(*feed)[:11],
+            'group_posts': self.group.posts.for_feed().order_by(*feed)[:11],
+            'profile': self.author.posts.for_feed().order_by(*feed)[:11],
+            'follow_index': (
+                follow_feed(self.reader).for_feed()[:11]),
+            'post_view comments': self.post.comments.all(),
+            'followers': Follow.objects.filter(author=self.author),
+        }
+
+    def indexes(self):
+        for model in (Post, Comment, Follow, FeedEntry):
+            for index in model._meta.indexes:
+                yield model, index
+
+    def drop_indexes(self):
+        # SQLite не даёт войти в schema_editor() внутри транзакции,
+        # а CREATE/DROP INDEX ему и не нужны: хватает execute().
+        editor = connection.schema_editor()
+        for model, index in self.indexes():
+            editor.remove_index(model, index)
+
+    def create_indexes(self):
+        editor = connection.schema_editor()
+        for model, index in self.indexes():
+            editor.add_index(model, index)
+
+    def report(self, queries, repeat):
+        for name, queryset in queries.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(f'-- {name}: {elapsed:.2f} мс')
+            self.stdout.write(queryset.explain())
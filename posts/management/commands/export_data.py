@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import FORMATS, TRANSFERS, export_data, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии или подписки в JSONL/CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=TRANSFERS)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для выгрузки, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению или jsonl'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, model, output, format, chunk_size, **options):
+        fmt = guess_format(output, format)
+        if output == '-':
+            export_data(model, self.stdout, fmt, chunk_size)
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            export_data(model, stream, fmt, chunk_size)
+        self.stderr.write(f'Выгружено в {output}')
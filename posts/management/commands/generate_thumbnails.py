@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.thumbnails import process_pending
+from posts.thumbnails import retry_failed as retry
+
+
+class Command(BaseCommand):
+    help = (
+        'Делает миниатюры загруженных картинок постов. С --watch работает '
+        'как фоновый воркер и опрашивает базу на новые загрузки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', action='store_true')
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Пауза между опросами в секундах'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Сколько постов обрабатывать за один опрос'
+        )
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Вернуть в очередь картинки, исчерпавшие попытки'
+        )
+
+    def handle(self, *args, watch, interval, batch_size, retry_failed,
+               **options):
+        if retry_failed:
+            self.stdout.write(f'Возвращено в очередь: {retry()}')
+        if not watch:
+            done, failed = process_pending()
+            self.stdout.write(self.style.SUCCESS(f'Готово миниатюр: {done}'))
+            if failed:
+                self.stdout.write(self.style.WARNING(
+                    f'Не удалось: {failed}'))
+            return
+        while True:
+            close_old_connections()
+            if not any(process_pending(batch_size)):
+                time.sleep(interval)
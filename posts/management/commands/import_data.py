@@ -0,0 +1,57 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.cache import bump_feed_version
+from posts.transfer import (FORMATS, TRANSFERS, batches, guess_format,
+                            import_batch, read_rows, reset_sequences)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии или подписки из JSONL/CSV '
+        'пачками bulk_create. Порядок: group, post, comment, follow.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=TRANSFERS)
+        parser.add_argument(
+            'path', nargs='?', default='-',
+            help='Файл с данными, по умолчанию stdin'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла, по умолчанию по расширению или jsonl'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк вставлять за одну транзакцию'
+        )
+        parser.add_argument(
+            '--skip-existing', action='store_true',
+            help='Пропускать строки, которые уже есть в базе'
+        )
+
+    def handle(self, *args, model, path, format, batch_size, skip_existing,
+               **options):
+        fmt = guess_format(path, format)
+        transfer = TRANSFERS[model]
+        if path == '-':
+            total = self.load(transfer, sys.stdin, fmt, batch_size,
+                              skip_existing)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                total = self.load(transfer, stream, fmt, batch_size,
+                                  skip_existing)
+        reset_sequences(transfer.model)
+        bump_feed_version()
+        self.stdout.write(self.style.SUCCESS(f'Загружено строк: {total}'))
+
+    def load(self, transfer, stream, fmt, batch_size, skip_existing):
+        total = 0
+        for batch in batches(read_rows(stream, fmt), batch_size):
+            with transaction.atomic():
+                total += import_batch(transfer, batch, skip_existing)
+            self.stderr.write(f'{total}…', ending='\r')
+        return total
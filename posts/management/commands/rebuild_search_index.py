@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.search import get_backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс постов и комментариев, например '
+        'после массового импорта в обход сигналов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            get_backend().rebuild(batch_size)
+        self.stdout.write(self.style.SUCCESS('Поисковый индекс перестроен'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import repair_posts, repair_users
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики профилей и комментариев, чинит расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк читать и обновлять за раз'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        with transaction.atomic():
+            posts = repair_posts(batch_size)
+        with transaction.atomic():
+            users = repair_users(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено постов: {posts}, пользователей: {users}'
+        ))
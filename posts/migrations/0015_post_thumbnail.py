@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_auto_20261018_1907'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, help_text='Заполняется в фоне после загрузки картинки', upload_to='', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:20
+
+from django.db import migrations
+
+TABLE = 'posts_search'
+
+
+def create_index(apps, schema_editor):
+    # Полнотекстовый индекс есть только у SQLite; на других базах
+    # работает posts.search.LikeSearch без отдельной таблицы.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5('
+        f"body, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2')"
+    )
+    insert = (
+        f'INSERT INTO {TABLE} (rowid, body, post_id) VALUES (%s, %s, %s)')
+    for pk, text in Post.objects.values_list('id', 'text').iterator():
+        schema_editor.execute(insert, (pk * 2, text, pk))
+    comments = Comment.objects.values_list('id', 'post_id', 'text')
+    for pk, post_id, text in comments.iterator():
+        schema_editor.execute(insert, (pk * 2 + 1, text, post_id))
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_feedentry_pub_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnail_attempts',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='После POST_THUMBNAIL_MAX_ATTEMPTS картинку не трогают', verbose_name='Неудачных попыток миниатюры'),
+        ),
+    ]
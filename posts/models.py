@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
 
@@ -19,6 +21,17 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Выборка под карточки include/post.html без запросов на пост."""
+        return self.select_related('author', 'group').only(
+            'id', 'text', 'pub_date', 'image', 'thumbnail', 'image_variants',
+            'author__id', 'author__username', 'author__first_name',
+            'author__last_name',
+            'group__id', 'group__slug', 'group__title', 'comments_count',
+        )
+
+
 class Post(models.Model):
     text = models.TextField('Текст')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
@@ -31,15 +44,43 @@ class Post(models.Model):
                               help_text=('Группа, в которой '
                                          'публикуется запись'),)
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    thumbnail = models.ImageField(
+        'Миниатюра', blank=True, editable=False,
+        help_text='Заполняется в фоне после загрузки картинки')
+    image_variants = models.TextField(
+        'Варианты картинки', blank=True, editable=False,
+        help_text='JSON: формат -> [[ширина, путь], ...]')
+    thumbnail_attempts = models.PositiveSmallIntegerField(
+        'Неудачных попыток миниатюры', default=0, editable=False,
+        help_text='После POST_THUMBNAIL_MAX_ATTEMPTS картинку не трогают')
+    comments_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(fields=('-pub_date', '-id'),
+                         name='post_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def variants(self):
+        try:
+            return json.loads(self.image_variants or '{}')
+        except ValueError:
+            return {}
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -62,6 +103,10 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(fields=('post', '-created'),
+                         name='comment_post_created_idx'),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -88,6 +133,65 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=('user', 'author'), name='unique_link'),
         )
+        indexes = (
+            models.Index(fields=('author', 'user'),
+                         name='follow_author_user_idx'),
+        )
 
     def __str__(self):
         return f'{self.user.username} подписан на {self.author.username}'
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        related_name='feed_entries',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    # Копия Post.pub_date: лента читается одним диапазоном индекса
+    # (user, pub_date, post) без сортировки по таблице постов.
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_feed_entry'),
+        )
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='feed_user_pub_date_idx'),
+        )
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
+
+
+class UserCounters(models.Model):
+    """Счётчики карточки профиля, поддерживаемые при записи."""
+    user = models.OneToOneField(
+        User,
+        related_name='counters',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Пользователь'
+    )
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user_id}'
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Comment, Post
+
+TABLE = 'posts_search'
+TOKEN = re.compile(r'\w+')
+
+
+def tokenize(query):
+    """Слова запроса без знаков препинания и операторов FTS5."""
+    return TOKEN.findall(query)
+
+
+def encode_cursor(score, pk):
+    raw = f'{score!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает курсор выдачи, для битого курсора возвращает None."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        score, pk = raw.split('|')
+        return float(score), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+class SearchBackend:
+    """
+    Интерфейс поискового индекса по текстам постов и комментариев.
+
+    search() возвращает id постов по убыванию релевантности и курсор
+    следующей страницы; пост находится и по тексту своих комментариев.
+    """
+
+    def index_post(self, post):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self, batch_size=500):
+        pass
+
+    def search(self, query, cursor=None, limit=10):
+        raise NotImplementedError
+
+    def match(self, model, query):
+        """Id объектов model, в тексте которых есть все слова запроса."""
+        raise NotImplementedError
+
+
+class LikeSearch(SearchBackend):
+    """
+    Поиск без индекса через icontains для баз без полнотекстового
+    поиска. Ранжирования нет: выдача идёт от новых постов к старым.
+    """
+
+    def search(self, query, cursor=None, limit=10):
+        words = tokenize(query)
+        if not words:
+            return [], None
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(
+                Q(text__icontains=word) | Q(comments__text__icontains=word))
+        decoded = decode_cursor(cursor)
+        if decoded is not None:
+            posts = posts.filter(id__lt=decoded[1])
+        ids = list(posts.order_by('-id').values_list(
+            'id', flat=True).distinct()[:limit + 1])
+        next_cursor = None
+        if len(ids) > limit:
+            ids = ids[:limit]
+            next_cursor = encode_cursor(0.0, ids[-1])
+        return ids, next_cursor
+
+    def match(self, model, query):
+        objects = model.objects.all()
+        for word in tokenize(query):
+            objects = objects.filter(text__icontains=word)
+        return objects.values('id')
+
+
+class SQLiteSearch(SearchBackend):
+    """
+    Инвертированный индекс SQLite FTS5 в таблице posts_search.
+
+    rowid строки кодирует объект: 2 * id для поста и 2 * id + 1 для
+    комментария, поэтому обновление и удаление идут по первичному
+    ключу индекса, а не перебором неиндексируемых колонок.
+    """
+
+    @staticmethod
+    def rowid(model, pk):
+        return pk * 2 + (model is Comment)
+
+    @staticmethod
+    def expression(query):
+        # Каждое слово берётся в кавычки: так пользовательский ввод не
+        # разбирается как синтаксис FTS5, а * ищет слово по началу.
+        return ' '.join(f'"{word}"*' for word in tokenize(query))
+
+    def _write(self, model, pk, post_id, text):
+        rowid = self.rowid(model, pk)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [rowid])
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, body, post_id) '
+                f'VALUES (%s, %s, %s)',
+                [rowid, text, post_id]
+            )
+
+    def _delete(self, model, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE rowid = %s',
+                [self.rowid(model, pk)]
+            )
+
+    def index_post(self, post):
+        self._write(Post, post.pk, post.pk, post.text)
+
+    def index_comment(self, comment):
+        self._write(Comment, comment.pk, comment.post_id, comment.text)
+
+    def remove_post(self, post_id):
+        self._delete(Post, post_id)
+
+    def remove_comment(self, comment_id):
+        self._delete(Comment, comment_id)
+
+    def rebuild(self, batch_size=500):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            for model, post_field in ((Post, 'id'), (Comment, 'post_id')):
+                rows = model.objects.values_list(
+                    'id', post_field, 'text').iterator(chunk_size=batch_size)
+                cursor.executemany(
+                    f'INSERT INTO {TABLE} (rowid, body, post_id) '
+                    f'VALUES (%s, %s, %s)',
+                    ((self.rowid(model, pk), text, post_id)
+                     for pk, post_id, text in rows)
+                )
+            cursor.execute(
+                f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+
+    def search(self, query, cursor=None, limit=10):
+        expression = self.expression(query)
+        if not expression:
+            return [], None
+        # rank — это bm25(): чем меньше, тем релевантнее. Пост получает
+        # лучший ранг среди своего текста и текстов комментариев.
+        sql = (
+            f'SELECT post_id, MIN(rank) AS score FROM {TABLE} '
+            f'WHERE {TABLE} MATCH %s GROUP BY post_id'
+        )
+        params = [expression]
+        decoded = decode_cursor(cursor)
+        if decoded is not None:
+            score, pk = decoded
+            sql += ' HAVING score > %s OR (score = %s AND post_id < %s)'
+            params += [score, score, pk]
+        sql += ' ORDER BY score, post_id DESC LIMIT %s'
+        params.append(limit + 1)
+        with connection.cursor() as db:
+            db.execute(sql, params)
+            rows = db.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(*rows[-1][::-1])
+        return [post_id for post_id, _ in rows], next_cursor
+
+    def match(self, model, query):
+        expression = self.expression(query)
+        if not expression:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} '
+                f'WHERE {TABLE} MATCH %s AND rowid %% 2 = %s',
+                [expression, int(model is Comment)]
+            )
+            return [rowid // 2 for rowid, in cursor.fetchall()]
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+def search_posts(query, cursor=None, limit=10):
+    """Посты для ленты в порядке выдачи и курсор следующей страницы."""
+    ids, next_cursor = get_backend().search(query, cursor, limit)
+    posts = Post.objects.for_feed().in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts], next_cursor
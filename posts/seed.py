@@ -0,0 +1,107 @@
+"""Синтетические данные для замеров производительности лент."""
+import random
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from . import counters, search
+from .models import Comment, FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+BATCH_SIZE = 500
+WORDS = (
+    'дятел', 'синица', 'воробей', 'скворец', 'снегирь', 'ворона', 'утро',
+    'лес', 'город', 'река', 'поле', 'зима', 'весна', 'лето', 'осень',
+    'прилетел', 'увидел', 'услышал', 'запел', 'улетел', 'рядом', 'далеко',
+)
+
+
+def zipf_weights(count, alpha):
+    """Веса степенного закона: k-й по популярности получает 1 / k^alpha."""
+    return [1 / rank ** alpha for rank in range(1, count + 1)]
+
+
+def sample_weighted(rng, population, weights, count):
+    """count разных элементов, вероятность выбора пропорциональна весу."""
+    count = min(count, len(population))
+    chosen = set()
+    while len(chosen) < count:
+        chosen.update(rng.choices(population, weights, k=count - len(chosen)))
+    return chosen
+
+
+def seed(users=200, groups=10, posts=20000, comments=20000, follows=20,
+         alpha=1.2, prefix='bench', random_seed=None):
+    """
+    Заполняет базу и возвращает id созданных объектов.
+
+    Популярность пользователей подчиняется степенному закону: первые
+    пользователи получают большую часть подписчиков, постов и
+    комментариев, как в настоящих соцсетях. Ленты подписок, счётчики
+    и поисковый индекс заполняются так же, как их заполнили бы
+    сигналы, поэтому данные пригодны для замеров любых представлений.
+    """
+    rng = random.Random(random_seed)
+    # bulk_create в SQLite не возвращает первичные ключи,
+    # поэтому после каждой вставки идентификаторы читаются заново.
+    User.objects.bulk_create(
+        User(username=f'{prefix}_{i}') for i in range(users))
+    user_ids = list(User.objects.filter(
+        username__startswith=f'{prefix}_').order_by('id').values_list(
+            'id', flat=True))
+    weights = zipf_weights(len(user_ids), alpha)
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'{prefix}-{i}', description='-')
+        for i in range(groups))
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f'{prefix}-').values_list('id', flat=True))
+    Post.objects.bulk_create(
+        (Post(text=' '.join(rng.choices(WORDS, k=8)),
+              author_id=rng.choices(user_ids, weights)[0],
+              group_id=rng.choice(group_ids + [None]))
+         for _ in range(posts)),
+        batch_size=BATCH_SIZE
+    )
+    post_rows = list(Post.objects.filter(
+        author_id__in=user_ids).values_list('id', 'author_id', 'pub_date'))
+    post_ids = [pk for pk, _, _ in post_rows]
+    # Комментируют чаще популярные посты: вес поста — вес его автора.
+    popularity = dict(zip(user_ids, weights))
+    post_weights = [popularity[author] for _, author, _ in post_rows]
+    Comment.objects.bulk_create(
+        (Comment(text=' '.join(rng.choices(WORDS, k=5)),
+                 author_id=rng.choice(user_ids),
+                 post_id=rng.choices(post_ids, post_weights)[0])
+         for _ in range(comments)),
+        batch_size=BATCH_SIZE
+    )
+    pairs = {
+        (user, author)
+        for user in user_ids
+        for author in sample_weighted(rng, user_ids, weights, follows)
+        if author != user
+    }
+    Follow.objects.bulk_create(
+        (Follow(user_id=user, author_id=author) for user, author in pairs),
+        batch_size=BATCH_SIZE
+    )
+    users_qs = User.objects.filter(pk__in=user_ids)
+    counters.repair_users(BATCH_SIZE, users_qs)
+    counters.repair_posts(BATCH_SIZE, Post.objects.filter(pk__in=post_ids))
+    pulled = set(users_qs.filter(
+        counters__followers_count__gte=settings.FEED_FANOUT_LIMIT
+    ).values_list('id', flat=True))
+    authored = {}
+    for post, author, pub_date in post_rows:
+        authored.setdefault(author, []).append((post, pub_date))
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user, post_id=post, pub_date=pub_date)
+         for user, author in pairs if author not in pulled
+         for post, pub_date in authored.get(author, ())),
+        batch_size=BATCH_SIZE
+    )
+    search.get_backend().rebuild(BATCH_SIZE)
+    return SimpleNamespace(
+        users=user_ids, weights=weights, groups=group_ids, posts=post_ids)
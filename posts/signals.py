@@ -0,0 +1,164 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import cache, counters, feed, search
+from yatube import page_cache
+
+from .models import Comment, Follow, Group, Post, User
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def feed_changed(sender, **kwargs):
+    cache.bump_feed_version()
+
+
+def logged_in_only(update_fields):
+    # Вход сохраняет только last_login, на страницах его нет.
+    return bool(update_fields) and set(update_fields) <= {'last_login'}
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, update_fields=None, **kwargs):
+    if created or logged_in_only(update_fields):
+        return
+    # Имя автора в карточках лент и шапке профиля, и ленты, и профиль
+    # запомнены с объектами автора: сбрасываются обе версии.
+    cache.bump_feed_version()
+    cache.bump_profile_version(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    cache.bump_follow_version(instance.user_id)
+    # Счётчики подписок в шапке профиля меняются у обоих.
+    cache.bump_profile_version(instance.user_id)
+    cache.bump_profile_version(instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, posts_count=1)
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump(instance.author_id, followers_count=1)
+        counters.bump(instance.user_id, following_count=1)
+        feed.followed(instance.user, instance.author)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump(instance.author_id, followers_count=-1)
+    counters.bump(instance.user_id, following_count=-1)
+    feed.unfollowed(instance.user, instance.author)
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    counters.deleting(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    counters.deleted(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_indexed(sender, instance, **kwargs):
+    search.get_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindexed(sender, instance, **kwargs):
+    search.get_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_indexed(sender, instance, **kwargs):
+    search.get_backend().index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_unindexed(sender, instance, **kwargs):
+    search.get_backend().remove_comment(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_page_purged(sender, instance, created, **kwargs):
+    if created:
+        tags = ['list:index', f'list:author:{instance.author_id}',
+                f'profile:{instance.author_id}']
+    else:
+        tags = [f'post:{instance.pk}']
+    if instance.group_id is not None:
+        # При правке пост мог перейти в другую группу.
+        tags.append(f'list:group:{instance.group.slug}')
+    page_cache.purge(*tags)
+
+
+@receiver(post_delete, sender=Post)
+def post_delete_purged(sender, instance, **kwargs):
+    page_cache.purge(f'post:{instance.pk}', f'profile:{instance.author_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_purged(sender, instance, **kwargs):
+    page_cache.purge(f'post:{instance.post_id}')
+
+
+@receiver(pre_save, sender=Group)
+def group_renamed(sender, instance, **kwargs):
+    if instance.pk is None:
+        return
+    old = Group.objects.filter(pk=instance.pk).values_list(
+        'slug', flat=True).first()
+    if old is not None and old != instance.slug:
+        page_cache.purge(f'group:{old}', f'list:group:{old}')
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_purged(sender, instance, **kwargs):
+    page_cache.purge(f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=User)
+def user_purged(sender, instance, update_fields=None, **kwargs):
+    if logged_in_only(update_fields):
+        return
+    page_cache.purge(f'author:{instance.pk}', f'profile:{instance.pk}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_purged(sender, instance, **kwargs):
+    page_cache.purge(
+        f'profile:{instance.author_id}', f'profile:{instance.user_id}')
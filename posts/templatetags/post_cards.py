@@ -0,0 +1,25 @@
+from django import template
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from posts.cache import CARD_TIMEOUT, card_key
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Собирает ленту из закэшированных карточек за один get_many."""
+    user = context.get('user')
+    keys = {card_key(post, user): post for post in posts}
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = get_template('include/post.html')
+    for key, post in keys.items():
+        if key not in cards:
+            missing[key] = cards[key] = card_template.render(
+                {'post': post, 'user': user})
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+    return mark_safe(''.join(cards[key] for key in keys))
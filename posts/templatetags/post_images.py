@@ -0,0 +1,35 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+SIZES = '(max-width: 576px) 100vw, 960px'
+
+
+def srcset(storage, variants):
+    return ', '.join(
+        f'{storage.url(name)} {width}w' for width, name in variants)
+
+
+@register.simple_tag
+def post_picture(post, css_class='card-img'):
+    """<picture> с адаптивными копиями картинки поста."""
+    variants = post.variants
+    storage = post.image.storage
+    fallback = variants.get('jpeg') or next(iter(variants.values()))
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[fmt], srcset(storage, items), SIZES)
+         for fmt, items in variants.items() if fmt != 'jpeg')
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'loading="lazy" /></picture>',
+        sources, css_class, post.thumbnail.url,
+        srcset(storage, fallback), SIZES
+    )
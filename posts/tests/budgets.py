@@ -0,0 +1,73 @@
+"""
+Бюджеты представлений: сколько запросов к базе и миллисекунд можно
+потратить на один запрос к странице.
+
+Бюджеты задаются в секции [budgets] файла setup.cfg по имени URL:
+
+    index = 6, 300
+
+Первое число — максимум запросов к базе, второе — максимум миллисекунд.
+Переменная окружения BUDGET_TIME_FACTOR растягивает временные бюджеты
+на медленных машинах.
+"""
+import os
+import time
+from configparser import ConfigParser
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+SETUP_CFG = os.path.join(settings.BASE_DIR, 'setup.cfg')
+
+
+class Budget(NamedTuple):
+    queries: int
+    milliseconds: float
+
+
+@lru_cache(maxsize=None)
+def load_budgets(path=SETUP_CFG):
+    parser = ConfigParser()
+    parser.read(path, encoding='utf-8')
+    factor = float(os.environ.get('BUDGET_TIME_FACTOR', 1))
+    budgets = {}
+    for name, value in parser.items('budgets'):
+        queries, milliseconds = (part.strip() for part in value.split(','))
+        budgets[name] = Budget(int(queries), float(milliseconds) * factor)
+    return budgets
+
+
+def budget_for(name):
+    budgets = load_budgets()
+    return budgets.get(name, budgets['default'])
+
+
+def format_queries(queries):
+    return '\n'.join(
+        f'{number}. {query["sql"]}'
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+@contextmanager
+def within_budget(name):
+    """Падает с AssertionError, если код внутри превысил бюджет name."""
+    budget = budget_for(name)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        yield queries
+        elapsed = (time.perf_counter() - started) * 1000
+    if len(queries) > budget.queries:
+        raise AssertionError(
+            f'{name}: {len(queries)} запросов к базе при бюджете '
+            f'{budget.queries}:\n{format_queries(queries.captured_queries)}'
+        )
+    if elapsed > budget.milliseconds:
+        raise AssertionError(
+            f'{name}: {elapsed:.0f} мс при бюджете '
+            f'{budget.milliseconds:.0f} мс'
+        )
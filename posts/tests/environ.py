@@ -0,0 +1,17 @@
+"""
+Загрузка yatube/settings.py с другими переменными окружения.
+
+Настройки читают окружение при импорте, поэтому для проверки значений
+по умолчанию модуль исполняется заново, не трогая django.conf.settings.
+"""
+import importlib.util
+import os
+from unittest import mock
+
+
+def load_settings(**environ):
+    spec = importlib.util.find_spec('yatube.settings')
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch.dict(os.environ, environ, clear=True):
+        spec.loader.exec_module(module)
+    return module
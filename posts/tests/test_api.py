@@ -0,0 +1,152 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TestApi(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='api-avtor', first_name='Павел', last_name='Дуров')
+        cls.reader = User.objects.create_user(username='api-chitatel')
+        cls.group = Group.objects.create(
+            title='API', slug='api', description='Группа для API')
+        for i in range(12):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group)
+        Comment.objects.create(
+            text='Первый', post=cls.post, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_posts_page_and_cursor(self):
+        response = self.client.get(reverse('api_posts'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['results'][0], {
+            'id': self.post.pk,
+            'text': 'Пост 11',
+            'pub_date': self.post.pub_date.isoformat(),
+            'author': 'api-avtor',
+            'group': 'api',
+            'image': None,
+            'thumbnail': None,
+            'comments': 1,
+        })
+        self.assertIsNone(data['previous'])
+        rest = self.client.get(
+            reverse('api_posts'), {'cursor': data['next']}).json()
+        self.assertEqual(
+            [post['text'] for post in rest['results']], ['Пост 1', 'Пост 0'])
+        self.assertIsNone(rest['next'])
+
+    def test_unchanged_feed_returns_304_without_fetching_posts(self):
+        url = reverse('api_posts')
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(len(queries), 1, 'Только MAX(pub_date)')
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_new_post_changes_etag(self):
+        url = reverse('api_group_posts', args=(self.group.slug,))
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(
+            text='Свежий', author=self.author, group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Свежий')
+
+    def test_comment_changes_post_etag(self):
+        url = reverse('api_post', args=(self.post.pk,))
+        etag = self.client.get(url)['ETag']
+        Comment.objects.create(
+            text='Второй', post=self.post, author=self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments'], 2)
+
+    def test_comments(self):
+        response = self.client.get(
+            reverse('api_comments', args=(self.post.pk,)))
+        self.assertEqual(response.json()['results'][0]['text'], 'Первый')
+
+    def test_groups(self):
+        response = self.client.get(reverse('api_groups'))
+        self.assertEqual(response.json(), {'results': [{
+            'slug': 'api', 'title': 'API', 'description': 'Группа для API',
+        }]})
+
+    def test_profile(self):
+        response = self.client.get(
+            reverse('api_profile', args=(self.author.username,)))
+        self.assertEqual(response.json(), {
+            'username': 'api-avtor',
+            'full_name': 'Павел Дуров',
+            'followers_count': 1,
+            'following_count': 0,
+            'posts_count': 12,
+        })
+        response = self.client.get(
+            reverse('api_profile_posts', args=(self.author.username,)))
+        self.assertEqual(len(response.json()['results']), 10)
+
+    def test_follow_requires_login(self):
+        response = self.client.get(reverse('api_follow'))
+        self.assertEqual(response.status_code, 401)
+
+    def cache_control(self, response):
+        return {
+            directive.strip()
+            for directive in response['Cache-Control'].split(',')
+        }
+
+    def test_follow_feed_is_private(self):
+        response = self.reader_client.get(reverse('api_follow'))
+        self.assertEqual(len(response.json()['results']), 10)
+        self.assertEqual(self.cache_control(response), {'no-cache', 'private'})
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_public_endpoints_are_not_private(self):
+        for url in (
+            reverse('api_posts'),
+            reverse('api_groups'),
+            reverse('api_profile', args=(self.author.username,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(self.cache_control(response), {'no-cache'})
+
+    def test_missing_objects_return_404(self):
+        for url in (
+            reverse('api_post', args=(0,)),
+            reverse('api_comments', args=(0,)),
+            reverse('api_group_posts', args=('net-takoy',)),
+            reverse('api_profile', args=('net-takogo',)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_only_safe_methods(self):
+        response = self.client.post(reverse('api_posts'))
+        self.assertEqual(response.status_code, 405)
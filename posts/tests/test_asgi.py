@@ -0,0 +1,115 @@
+import asyncio
+from concurrent.futures import Executor, Future
+
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.test import TestCase
+
+from posts.models import Post
+from yatube.asgi_adapter import ASGIHandler, build_environ
+
+User = get_user_model()
+
+
+class InlineExecutor(Executor):
+    """Выполняет запрос в потоке теста: тестовая база видна только ему."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def scope(method, path, query=b'', headers=()):
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'path': path, 'query_string': query, 'headers': list(headers),
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+
+
+class TestASGIHandler(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='asinhronny')
+        Post.objects.create(text='Пост через ASGI', author=cls.author)
+
+    def setUp(self):
+        self.app = ASGIHandler(
+            get_wsgi_application(), executor=InlineExecutor())
+
+    def call(self, scope, body=b''):
+        messages = [{'type': 'http.request', 'body': body}]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(self.app(scope, receive, send))
+        start, body = sent
+        return start['status'], dict(start['headers']), body['body']
+
+    def test_feed_page(self):
+        status, headers, body = self.call(scope('GET', '/'))
+        self.assertEqual(status, 200)
+        self.assertIn('Пост через ASGI', body.decode())
+        self.assertIn(b'text/html', headers[b'content-type'])
+
+    def test_unicode_path_and_query(self):
+        status, _, body = self.call(
+            scope('GET', '/search/', 'q=ASGI'.encode()))
+        self.assertEqual(status, 200)
+        self.assertIn('Пост через ASGI', body.decode())
+        status, _, _ = self.call(scope('GET', '/группа-нет/'))
+        self.assertEqual(status, 404)
+
+    def test_request_body_reaches_application(self):
+        def echo(environ, start_response):
+            length = int(environ['CONTENT_LENGTH'])
+            start_response('201 Created', [('X-Method', environ[
+                'REQUEST_METHOD'])])
+            return [environ['wsgi.input'].read(length)]
+
+        self.app = ASGIHandler(echo, executor=InlineExecutor())
+        status, headers, body = self.call(scope(
+            'POST', '/new/', headers=[(b'content-length', b'9')]),
+            body=b'text=test')
+        self.assertEqual(status, 201)
+        self.assertEqual(headers[b'x-method'], b'POST')
+        self.assertEqual(body, b'text=test')
+
+    def test_lifespan(self):
+        messages = [
+            {'type': 'lifespan.shutdown'}, {'type': 'lifespan.startup'}]
+        sent = []
+
+        async def receive():
+            return messages.pop()
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+
+class TestBuildEnviron(TestCase):
+    def test_headers_and_path(self):
+        environ = build_environ(scope('GET', '/путь/', b'a=1', headers=[
+            (b'content-type', b'text/plain'),
+            (b'x-forwarded-for', b'1.1.1.1'),
+            (b'x-forwarded-for', b'2.2.2.2'),
+        ]), b'')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(
+            environ['HTTP_X_FORWARDED_FOR'], '1.1.1.1,2.2.2.2')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/путь/')
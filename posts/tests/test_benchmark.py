@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.cache import FEED_VERSION_KEY
+from posts.models import Follow, Post
+from posts.seed import seed, zipf_weights
+
+
+class TestBenchmark(TestCase):
+    def test_seed_power_law(self):
+        data = seed(users=50, groups=2, posts=200, comments=100, follows=5,
+                    random_seed=1)
+        self.assertEqual(len(data.posts), 200)
+        followers = [
+            Follow.objects.filter(author_id=pk).count() for pk in data.users]
+        self.assertGreater(followers[0], followers[-1])
+        self.assertEqual(zipf_weights(3, 1), [1, 1 / 2, 1 / 3])
+
+    def test_report_and_rollback(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command(
+                'benchmark_views', users=20, groups=2, posts=50,
+                comments=50, follows=3, requests=3, warmup=1,
+                output=output, stderr=StringIO())
+            call_command(
+                'benchmark_views', users=20, groups=2, posts=50,
+                comments=50, follows=3, requests=3, warmup=1,
+                views=['index'], baseline=output,
+                stdout=StringIO(), stderr=StringIO())
+            with open(output, encoding='utf-8') as stream:
+                report = json.load(stream)
+        self.assertEqual(set(report['views']), {
+            'index', 'group_posts', 'profile', 'post_view', 'follow_index',
+            'search', 'new_post', 'add_comment',
+        })
+        for result in report['views'].values():
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertGreater(result['queries_mean'], 0)
+        self.assertFalse(Post.objects.exists())
+
+    def test_rolled_back_pages_stay_out_of_site_cache(self):
+        cache.clear()
+        cache.set('sentinel', 1)
+        for cold in (False, True):
+            call_command(
+                'benchmark_views', users=10, groups=1, posts=20,
+                comments=10, follows=2, requests=2, warmup=1,
+                views=['index', 'new_post'], cold=cold,
+                stdout=StringIO(), stderr=StringIO())
+        self.assertIsNone(cache.get(FEED_VERSION_KEY))
+        self.assertEqual(cache.get('sentinel'), 1)
@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import api_urls, urls
+from posts.models import Comment, Follow, Group, Post
+
+from .budgets import within_budget
+
+User = get_user_model()
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TestBudgets(TestCase):
+    """
+    Каждое представление из posts/urls.py и posts/api_urls.py
+    укладывается в бюджет из setup.cfg на холодном кэше и полной
+    странице карточек, поэтому лишний запрос на карточку или комментарий
+    роняет тест.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='byudzhet')
+        cls.reader = User.objects.create_user(username='chitatel')
+        cls.group = Group.objects.create(
+            title='Бюджет', slug='budget', description='Группа')
+        for i in range(12):
+            post = Post.objects.create(
+                text=f'Пост про бюджет {i}', author=cls.author,
+                group=cls.group,
+                image=SimpleUploadedFile(f'{i}.gif', SMALL_GIF, 'image/gif'))
+            for _ in range(3):
+                Comment.objects.create(
+                    text='Комментарий про бюджет', post=post,
+                    author=cls.reader)
+        cls.post = post
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        cache.clear()
+
+    def cases(self):
+        """Имя URL -> запросы к нему: (клиент, метод, адрес, данные)."""
+        post_args = (self.author.username, self.post.id)
+        stranger = User.objects.create_user(username='neznakomets')
+        edit = reverse('post_edit', args=post_args)
+        return {
+            'index': [(self.client, 'get', reverse('index'), None)],
+            'group_posts': [(self.client, 'get', reverse(
+                'group_posts', args=(self.group.slug,)), None)],
+            'profile': [(self.client, 'get', reverse(
+                'profile', args=(self.author.username,)), None)],
+            'post': [(self.client, 'get', reverse('post', args=post_args),
+                      None)],
+            'follow_index': [
+                (self.client, 'get', reverse('follow_index'), None)],
+            'search': [
+                (self.client, 'get', reverse('search'), {'q': 'бюджет'})],
+            'new_post': [
+                (self.client, 'get', reverse('new_post'), None),
+                (self.client, 'post', reverse('new_post'),
+                 {'text': 'Новый пост', 'group': self.group.id}),
+            ],
+            'post_edit': [
+                (self.author_client, 'get', edit, None),
+                (self.author_client, 'post', edit,
+                 {'text': 'Исправленный пост', 'group': self.group.id}),
+            ],
+            'add_comment': [(self.client, 'post', reverse(
+                'add_comment', args=post_args), {'text': 'Ещё один'})],
+            'profile_follow': [(self.client, 'get', reverse(
+                'profile_follow', args=(stranger.username,)), None)],
+            'profile_unfollow': [(self.client, 'get', reverse(
+                'profile_unfollow', args=(self.author.username,)), None)],
+            'api_posts': [(self.client, 'get', reverse('api_posts'), None)],
+            'api_post': [(self.client, 'get', reverse(
+                'api_post', args=(self.post.id,)), None)],
+            'api_comments': [(self.client, 'get', reverse(
+                'api_comments', args=(self.post.id,)), None)],
+            'api_groups': [(self.client, 'get', reverse('api_groups'), None)],
+            'api_group_posts': [(self.client, 'get', reverse(
+                'api_group_posts', args=(self.group.slug,)), None)],
+            'api_profile': [(self.client, 'get', reverse(
+                'api_profile', args=(self.author.username,)), None)],
+            'api_profile_posts': [(self.client, 'get', reverse(
+                'api_profile_posts', args=(self.author.username,)), None)],
+            'api_follow': [
+                (self.client, 'get', reverse('api_follow'), None)],
+        }
+
+    def test_every_url_has_a_budget_case(self):
+        names = {
+            pattern.name
+            for pattern in urls.urlpatterns + api_urls.urlpatterns
+        }
+        self.assertEqual(names, set(self.cases()))
+
+    def test_views_within_budget(self):
+        for name, requests in self.cases().items():
+            for client, method, url, data in requests:
+                with self.subTest(name=name, method=method):
+                    cache.clear()
+                    with within_budget(name):
+                        response = getattr(client, method)(url, data)
+                    self.assertLess(response.status_code, 400)
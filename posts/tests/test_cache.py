@@ -1,10 +1,18 @@
-import time
+import os
+import shutil
+import tempfile
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Post
+from posts.cache import card_key
+from posts.models import Comment, Group, Post
+from posts.tests.environ import load_settings
+from yatube.cache_backends import SQLiteCache
 
 User = get_user_model()
 
@@ -15,20 +23,139 @@ class testCache(TestCase):
         super().setUpClass()
         cls.guest_client = Client()
         cls.user = User.objects.create(username='nikto')
-        Post.objects.create(
+        cls.post = Post.objects.create(
             text='Oba Boba',
             author=cls.user
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_show_post_in_index(self):
+        """Новый пост виден сразу, без ожидания истечения кэша."""
         response = self.guest_client.get(reverse('index'))
+        self.assertEqual(len(response.context['page']), 1)
         Post.objects.create(
             text='Obi Bobi',
             author=self.user
         )
-        context = response.context['page']
-        self.assertEqual(len(context), 1)
-        time.sleep(20)
         response = self.guest_client.get(reverse('index'))
-        context = response.context['page']
-        self.assertEqual(len(context), 2)
+        self.assertEqual(len(response.context['page']), 2)
+
+    def test_index_served_from_cache(self):
+        self.guest_client.get(reverse('index'))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Oba Boba')
+
+    def test_comment_invalidates_feed(self):
+        self.guest_client.get(reverse('index'))
+        Comment.objects.create(post=self.post, author=self.user, text='Да')
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_pages_and_users_cached_separately(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        self.guest_client.get(reverse('index'))
+        response = authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Редактировать')
+
+    @override_settings(FEED_CACHE_TIMEOUT=30)
+    def test_feed_pages_expire(self):
+        """Версия из locmem не доходит до других процессов: нужен срок."""
+        with mock.patch('posts.cache.cache.set',
+                        wraps=cache.set) as cache_set:
+            self.guest_client.get(reverse('index'))
+        timeouts = {call[0][2] for call in cache_set.call_args_list}
+        self.assertEqual(timeouts, {30})
+
+
+class TestCardCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='kartochnik')
+        cls.group = Group.objects.create(
+            title='Старое имя', slug='cards', description='Карточки')
+        cls.post = Post.objects.create(
+            text='Карточка', author=cls.user, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cards_cached_per_post(self):
+        self.client.get(reverse('index'))
+        post = Post.objects.for_feed().get(pk=self.post.pk)
+        self.assertIsNotNone(cache.get(card_key(post, AnonymousUser())))
+        self.assertIsNone(cache.get(card_key(post, self.user)))
+
+    def test_group_rename_renders_new_card(self):
+        self.client.get(reverse('group_posts', args=(self.group.slug,)))
+        self.group.title = 'Новое имя'
+        self.group.save()
+        response = self.client.get(
+            reverse('profile', args=(self.user.username,)))
+        self.assertContains(response, '#Новое имя')
+
+    def test_author_rename_renders_new_card(self):
+        self.client.get(reverse('index'))
+        self.client.get(reverse('post', args=('kartochnik', self.post.pk)))
+        author = User.objects.get(pk=self.user.pk)
+        author.username = 'pereimenovan'
+        author.first_name = 'Новое'
+        author.save()
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, '@pereimenovan')
+        self.assertNotContains(response, 'kartochnik')
+        response = self.client.get(
+            reverse('post', args=('pereimenovan', self.post.pk)))
+        self.assertContains(response, 'Пост от Новое')
+
+
+class TestCacheSettings(SimpleTestCase):
+    def options(self, backend):
+        settings = load_settings(CACHE_BACKEND=backend)
+        return settings.CACHES['default']['OPTIONS']
+
+    def test_culling_backends_get_max_entries(self):
+        for backend in ('locmem', 'sqlite', 'file'):
+            with self.subTest(backend=backend):
+                self.assertIn('MAX_ENTRIES', self.options(backend))
+
+    def test_memcached_gets_no_unknown_options(self):
+        # MemcachedCache передаёт OPTIONS в memcache.Client(**options).
+        self.assertEqual(self.options('memcached'), {})
+
+
+class TestSQLiteCache(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        location = os.path.join(directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(location, {})
+        self.other = SQLiteCache(location, {})
+
+    def test_values_shared_between_instances(self):
+        """Два экземпляра на одном файле видят записи друг друга."""
+        self.cache.set('post', {'id': 1}, None)
+        self.assertEqual(self.other.get('post'), {'id': 1})
+        self.other.set_many({'a': 1, 'b': 2})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']),
+                         {'a': 1, 'b': 2})
+        self.cache.delete('a')
+        self.assertFalse(self.other.has_key('a'))
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('version', 1))
+        self.assertFalse(self.other.add('version', 5))
+        self.assertEqual(self.other.incr('version'), 2)
+        self.assertEqual(self.cache.get('version'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired_values_are_gone(self):
+        self.cache.set('old', 'value', -1)
+        self.assertIsNone(self.cache.get('old'))
+        self.assertTrue(self.cache.add('old', 'new'))
+        self.assertEqual(self.other.get('old'), 'new')
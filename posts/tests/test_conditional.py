@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class TestConditionalPages(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='uslovny')
+        cls.reader = User.objects.create_user(username='chitayushchy')
+        cls.group = Group.objects.create(
+            title='Условная', slug='uslovnaya', description='Группа')
+        cls.post = Post.objects.create(
+            text='Условный пост', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def urls(self):
+        post_args = (self.author.username, self.post.pk)
+        return (
+            reverse('index'),
+            reverse('group_posts', args=(self.group.slug,)),
+            reverse('profile', args=(self.author.username,)),
+            reverse('post', args=post_args),
+        )
+
+    def test_unchanged_pages_return_304(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Last-Modified', response)
+                cached = self.guest.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(cached.status_code, 304)
+                cached = self.guest.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(cached.status_code, 304)
+
+    def test_repeated_304_skips_database(self):
+        url = reverse('index')
+        etag = self.guest.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_anonymous_pages_are_public(self):
+        response = self.guest.get(reverse('index'))
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=60', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_user_pages_are_private(self):
+        response = self.client.get(reverse('index'))
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_etag_differs_per_viewer(self):
+        url = reverse('index')
+        self.assertNotEqual(
+            self.guest.get(url)['ETag'], self.client.get(url)['ETag'])
+
+    def test_new_comment_changes_post_page(self):
+        url = reverse('post', args=(self.author.username, self.post.pk))
+        etag = self.guest.get(url)['ETag']
+        Comment.objects.create(
+            text='Новый', post=self.post, author=self.reader)
+        response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый')
+
+    def test_follow_changes_follow_index_and_profile(self):
+        urls = (
+            reverse('follow_index'),
+            reverse('profile', args=(self.author.username,)),
+        )
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        Follow.objects.create(user=self.reader, author=self.author)
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_missing_pages_still_404(self):
+        for url in (
+            reverse('group_posts', args=('net-takoy',)),
+            reverse('profile', args=('net-takogo',)),
+            reverse('post', args=(self.author.username, 0)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.guest.get(url).status_code, 404)
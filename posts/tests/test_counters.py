@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+class TestCounters(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='schetovod')
+        cls.reader = User.objects.create_user(username='chitatel')
+        cls.post = Post.objects.create(text='Считаем', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_views_keep_counters(self):
+        self.client.get(
+            reverse('profile_follow', args=(self.author.username,)))
+        self.client.post(
+            reverse('add_comment', args=(self.author.username, self.post.id)),
+            data={'text': 'Первый'}
+        )
+        self.client.post(reverse('new_post'), data={'text': 'Ответ'})
+        author = UserCounters.objects.get(user=self.author)
+        reader = UserCounters.objects.get(user=self.reader)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(reader.following_count, 1)
+        self.assertEqual(reader.posts_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.client.get(
+            reverse('profile_unfollow', args=(self.author.username,)))
+        author.refresh_from_db()
+        self.assertEqual(author.followers_count, 0)
+
+    def test_profile_card_uses_counters(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(
+            reverse('profile', args=(self.author.username,)))
+        self.assertEqual(response.context['counters'].followers_count, 1)
+        self.assertContains(response, 'Подписчиков: 1')
+
+    def test_recount_repairs_drift(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounters.objects.filter(user=self.author).update(
+            followers_count=7, posts_count=0)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=3)
+        UserCounters.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+        author = UserCounters.objects.get(user=self.author)
+        self.assertEqual(author.followers_count, 1)
+        self.assertEqual(author.posts_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=self.reader).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertIn('пользователей: 2', out.getvalue())
+
+
+class TestUserDeletion(TestCase):
+    def test_delete_user_with_posts_comments_and_follows(self):
+        author = User.objects.create_user(username='uhodyashchiy')
+        fan = User.objects.create_user(username='poklonnik')
+        idol = User.objects.create_user(username='kumir')
+        fans = [fan] + [
+            User.objects.create_user(username=f'fan{i}') for i in range(2)]
+        for follower in fans:
+            Follow.objects.create(user=follower, author=author)
+        Follow.objects.create(user=author, author=idol)
+        Follow.objects.create(user=author, author=fan)
+        post = Post.objects.create(text='Прощальный', author=author)
+        Post.objects.create(text='Ещё один', author=author)
+        Comment.objects.create(text='Свой', post=post, author=author)
+        Comment.objects.create(text='Чужой', post=post, author=fan)
+        fan_post = Post.objects.create(text='Пост фаната', author=fan)
+        Comment.objects.create(text='Под чужим', post=fan_post, author=author)
+
+        User.objects.get(pk=author.pk).delete()
+
+        self.assertFalse(UserCounters.objects.filter(user_id=author.pk))
+        fan_counters = UserCounters.objects.get(user=fan)
+        self.assertEqual(fan_counters.following_count, 0)
+        self.assertEqual(fan_counters.followers_count, 0)
+        self.assertEqual(fan_counters.posts_count, 1)
+        self.assertEqual(
+            UserCounters.objects.get(user=idol).followers_count, 0)
+        fan_post.refresh_from_db()
+        self.assertEqual(fan_post.comments_count, 0)
@@ -0,0 +1,88 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.feed import follow_feed
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class TestFollowFeed(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='avtor')
+        cls.reader = User.objects.create_user(username='podpischik')
+        cls.old_post = Post.objects.create(
+            text='До подписки', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        self.client.get(
+            reverse('profile_follow', args=(self.author.username,)))
+        self.assertTrue(
+            FeedEntry.objects.filter(
+                user=self.reader, post=self.old_post).exists()
+        )
+        self.client.get(
+            reverse('profile_unfollow', args=(self.author.username,)))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(reverse('new_post'), data={'text': 'Свежий пост'})
+        post = Post.objects.get(text='Свежий пост')
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.reader, post=post).exists())
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']),
+                         [post, self.old_post])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled_on_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Для всех', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']),
+                         [post, self.old_post])
+
+    @skipUnless(connection.vendor == 'sqlite', 'план запроса SQLite')
+    def test_feed_is_index_range_read(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        plan = follow_feed(self.reader).for_feed()[:11].explain()
+        self.assertIn('feed_user_pub_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_author_reaching_limit_leaves_feeds(self):
+        other = User.objects.create_user(username='vtoroy')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader).exists())
+        Follow.objects.create(user=other, author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']), [self.old_post])
+
+    @override_settings(FEED_FANOUT_LIMIT=2)
+    def test_author_dropping_below_limit_backfills_feeds(self):
+        other = User.objects.create_user(username='vtoroy')
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Пока был звездой', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user_id', 'post_id')),
+            {(self.reader.pk, post.pk), (self.reader.pk, self.old_post.pk)})
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(list(response.context['page']),
+                         [post, self.old_post])
@@ -1,11 +1,13 @@
 import shutil
 import tempfile
+from io import BytesIO
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Comment, Post
 
@@ -141,3 +143,56 @@ class TestFormPost(TestCase):
         )
         response
         self.assertEqual(Comment.objects.count(), count)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class TestImageUpload(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='zagruzchik')
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def jpeg(self, size=(64, 48)):
+        exif = Image.Exif()
+        exif[0x0110] = 'Секретная камера'
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            'photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_exif_is_stripped(self):
+        self.client.post(
+            reverse('new_post'), {'text': 'Фото', 'image': self.jpeg()})
+        post = Post.objects.get(text='Фото')
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (64, 48))
+            self.assertEqual(len(image.getexif()), 0)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_oversized_upload_rejected(self):
+        response = self.client.post(
+            reverse('new_post'), {'image': self.jpeg(), 'text': 'Большое'})
+        self.assertEqual(
+            response.context['form'].errors['image'],
+            ['Картинка больше 100\xa0байт'])
+        # Поля после брошенного файла тоже разобраны.
+        self.assertEqual(response.context['form'].data['text'], 'Большое')
+        self.assertFalse(Post.objects.filter(text='Большое').exists())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_too_many_pixels_rejected(self):
+        response = self.client.post(
+            reverse('new_post'), {'text': 'Широкое', 'image': self.jpeg()})
+        self.assertIn(
+            'Картинка 64x48 слишком большая по числу пикселей',
+            response.context['form'].errors['image']
+        )
@@ -0,0 +1,81 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.cache_backends import MeteredCache
+from posts.tests.environ import load_settings
+from yatube.metrics import collect, registry
+
+User = get_user_model()
+
+
+class TestMetrics(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='izmeritel')
+        cls.staff = User.objects.create_user(
+            username='sotrudnik', is_staff=True)
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+        registry.clear()
+
+    def timing(self, response):
+        return dict(
+            re.match(r'\s*(\w+);(.*)', part).groups()
+            for part in response['Server-Timing'].split(',')
+            if ';' in part
+        )
+
+    def test_server_timing_header(self):
+        cold = self.timing(self.client.get(reverse('index')))
+        warm = self.timing(self.client.get(reverse('index')))
+        self.assertRegex(cold['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(cold['tpl'], r'dur=[\d.]+')
+        cold_misses = re.search(r'misses=(\d+)', cold['cache'])[1]
+        warm_misses = re.search(r'misses=(\d+)', warm['cache'])[1]
+        self.assertGreater(int(cold_misses), int(warm_misses))
+        self.assertRegex(warm['total'], r'dur=[\d.]+')
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('index'))
+        self.client.get(reverse('index'))
+        self.client.get(reverse('profile', args=(self.user.username,)))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="index"} 2', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket'
+            '{view="profile",le="+Inf"} 1', text)
+        self.assertRegex(text, r'yatube_db_queries_total\{view="index"\} \d')
+        self.assertRegex(text, r'yatube_cache_hits_total\{view="index"\} \d')
+
+    def test_metrics_hidden_from_public(self):
+        self.assertEqual(load_settings().METRICS_ALLOWED_IPS, [])
+        for name in ('metrics', 'metrics_queries'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 404)
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_metered_cache_counts_hits(self):
+        metered = MeteredCache('metered', {
+            'INNER_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        })
+        metered.set('a', 1)
+        with collect() as stats:
+            self.assertEqual(metered.get('a'), 1)
+            self.assertIsNone(metered.get('b'))
+            self.assertEqual(metered.get_many(['a', 'b', 'c']), {'a': 1})
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (2, 3))
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class TestPageCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='keshiruemy')
+        cls.other = User.objects.create_user(username='drugoy')
+        cls.group = Group.objects.create(
+            title='Кэш', slug='kesh', description='Группа')
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='drugaya', description='Группа')
+        cls.post = Post.objects.create(
+            text='Пост в кэше', author=cls.author, group=cls.group)
+        cls.other_post = Post.objects.create(
+            text='Чужой пост', author=cls.other, group=cls.other_group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+
+    def status(self, url):
+        return self.guest.get(url).get('X-Page-Cache')
+
+    def warm(self, *urls):
+        for url in urls:
+            self.assertEqual(self.status(url), 'miss')
+            self.assertEqual(self.status(url), 'hit')
+
+    def test_hit_skips_database(self):
+        url = reverse('index')
+        self.guest.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Пост в кэше')
+        self.assertEqual(len(queries), 0)
+
+    def test_surrogate_keys(self):
+        response = self.guest.get(
+            reverse('group_posts', args=(self.group.slug,)))
+        keys = response['Surrogate-Key'].split()
+        for key in ('list:group:kesh', 'group:kesh', f'post:{self.post.pk}',
+                    f'author:{self.author.pk}'):
+            self.assertIn(key, keys)
+
+    def test_conditional_hit(self):
+        url = reverse('index')
+        etag = self.guest.get(url)['ETag']
+        response = self.guest.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_session_cookie_bypasses_cache(self):
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('index')
+        client.get(url)
+        self.assertNotIn('X-Page-Cache', client.get(url))
+
+    def test_new_post_purges_its_lists_only(self):
+        index = reverse('index')
+        profile = reverse('profile', args=(self.author.username,))
+        other_group = reverse('group_posts', args=(self.other_group.slug,))
+        self.warm(index, profile, other_group)
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group)
+        self.assertEqual(self.status(index), 'miss')
+        self.assertEqual(self.status(profile), 'miss')
+        self.assertEqual(self.status(other_group), 'hit')
+
+    def test_comment_purges_its_post_only(self):
+        post = reverse('post', args=(self.author.username, self.post.pk))
+        other = reverse(
+            'post', args=(self.other.username, self.other_post.pk))
+        self.warm(post, other)
+        Comment.objects.create(
+            text='Комментарий', post=self.post, author=self.other)
+        self.assertEqual(self.status(post), 'miss')
+        self.assertEqual(self.status(other), 'hit')
+
+    def test_edit_purges_pages_showing_post(self):
+        index = reverse('index')
+        other_profile = reverse('profile', args=(self.other.username,))
+        self.warm(index, other_profile)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+        response = self.guest.get(index)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Исправленный пост')
+        self.assertEqual(self.status(other_profile), 'hit')
+
+    def test_group_save_purges_pages_showing_group(self):
+        index = reverse('index')
+        group = reverse('group_posts', args=(self.group.slug,))
+        self.warm(index, group)
+        renamed = Group.objects.get(pk=self.group.pk)
+        renamed.title = 'Кэш переименован'
+        renamed.save()
+        self.assertEqual(self.status(group), 'miss')
+        self.assertContains(self.guest.get(index), 'Кэш переименован')
+
+    def test_follow_purges_both_profiles(self):
+        profiles = [
+            reverse('profile', args=(user.username,))
+            for user in (self.author, self.other)
+        ]
+        self.warm(*profiles)
+        Follow.objects.create(user=self.other, author=self.author)
+        for url in profiles:
+            self.assertEqual(self.status(url), 'miss')
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_disabled_without_setting(self):
+        client = Client()
+        client.get(reverse('index'))
+        self.assertNotIn('X-Page-Cache', client.get(reverse('index')))
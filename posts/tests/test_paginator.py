@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.paginators import CursorPaginator
+
+User = get_user_model()
+
+
+class TestCursorPaginator(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='listaet')
+        cls.reader = User.objects.create_user(username='chitatel')
+        cls.group = Group.objects.create(
+            title='Лента',
+            slug='lenta',
+            description='Группа для листания'
+        )
+        for i in range(25):
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=cls.user,
+                group=cls.group
+            )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_walk_older_and_newer(self):
+        """Курсоры проходят всю ленту и возвращаются назад."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        expected = list(Post.objects.all())
+        first = paginator.get_page()
+        second = paginator.get_page(cursor=first.next_cursor)
+        third = paginator.get_page(cursor=second.next_cursor)
+        self.assertIsNone(first.previous_cursor)
+        self.assertIsNone(third.next_cursor)
+        self.assertEqual(
+            list(first) + list(second) + list(third), expected)
+        back = paginator.get_page(cursor=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+
+    def test_broken_cursor_returns_first_page(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page(cursor='не-курсор')
+        self.assertEqual(list(page), list(Post.objects.all()[:10]))
+
+    def test_cursor_page_skips_count(self):
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(1):
+            paginator.get_page()
+
+    def test_feed_views_render_cursor_links(self):
+        urls = (
+            reverse('index'),
+            reverse('group_posts', args=(self.group.slug,)),
+            reverse('profile', args=(self.user.username,)),
+            reverse('follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                page = response.context['page']
+                self.assertTrue(page.is_cursor)
+                self.assertContains(response, f'?cursor={page.next_cursor}')
+                response = self.client.get(
+                    url, data={'cursor': page.next_cursor})
+                self.assertEqual(len(response.context['page']), 10)
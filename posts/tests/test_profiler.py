@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.profiler import MinuteBudget, Sampler
+
+User = get_user_model()
+PROFILER_DIR = tempfile.mkdtemp()
+
+
+def busy_wait(seconds):
+    finish = time.perf_counter() + seconds
+    while time.perf_counter() < finish:
+        pass
+
+
+@override_settings(
+    PROFILER_ENABLED=True, PROFILER_SAMPLE_RATE=1, PROFILER_THRESHOLD_MS=0,
+    PROFILER_MAX_PER_MINUTE=1, PROFILER_URL_NAMES=['profile'],
+    PROFILER_INTERVAL_MS=1, PROFILER_DIR=PROFILER_DIR,
+)
+class TestProfiler(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='profiliruemy')
+        Post.objects.create(text='Медленный пост', author=cls.user)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(PROFILER_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_sampler_collects_stacks(self):
+        sampler = Sampler(0.001)
+        thread_id = threading.get_ident()
+        sampler.start(thread_id)
+        busy_wait(0.05)
+        stacks = sampler.stop(thread_id)
+        self.assertTrue(any(
+            stack.endswith('test_profiler:busy_wait') for stack in stacks))
+
+    def test_minute_budget(self):
+        budget = MinuteBudget(2)
+        self.assertEqual(
+            [budget.take(), budget.take(), budget.take()],
+            [True, True, False])
+
+    def test_slow_request_profile_written(self):
+        client = Client()
+        client.get(reverse('index'))
+        for _ in range(2):
+            client.get(reverse('profile', args=(self.user.username,)))
+        files = sorted(os.listdir(PROFILER_DIR))
+        self.assertEqual(len(files), 2)
+        folded, meta = (os.path.join(PROFILER_DIR, name) for name in files)
+        self.assertTrue(meta.endswith('.json'))
+        with open(meta, encoding='utf-8') as stream:
+            meta = json.load(stream)
+        self.assertEqual(meta['view'], 'profile')
+        self.assertEqual(meta['status'], 200)
+        self.assertTrue(meta['queries'])
+        with open(folded, encoding='utf-8') as stream:
+            for line in stream:
+                self.assertRegex(line, r'^profile;\S+ \d+$')
+
+    @override_settings(PROFILER_ENABLED=False)
+    def test_disabled_by_default(self):
+        before = os.listdir(PROFILER_DIR)
+        Client().get(reverse('profile', args=(self.user.username,)))
+        self.assertEqual(os.listdir(PROFILER_DIR), before)
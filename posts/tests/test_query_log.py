@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.tests.environ import load_settings
+from yatube.query_log import fingerprint, query_log
+
+User = get_user_model()
+
+
+@override_settings(QUERY_LOG_ENABLED=True)
+class TestQueryLog(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='otpechatok')
+        Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        query_log.clear()
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t1  WHERE id IN (%s, %s, %s)\n"
+                "AND name = 'it''s' AND x > 10 LIMIT 21"),
+            'SELECT * FROM t1 WHERE id IN (...) AND name = ? AND x > ? '
+            'LIMIT ?'
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_aggregated_by_view(self):
+        for _ in range(3):
+            self.client.get(reverse('profile', args=(self.user.username,)))
+        rows = [row for row in query_log.top() if row[0] == 'profile']
+        self.assertTrue(rows)
+        for view, sql, count, total, p95 in rows:
+            self.assertLessEqual(p95, total)
+            self.assertNotIn(self.user.username, sql)
+        # Автор страницы ищется на каждом запросе, даже из кэша.
+        self.assertIn(3, [count for _, _, count, _, _ in rows])
+        response = self.client.get(reverse('metrics_queries'))
+        self.assertContains(response, 'profile\t')
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_queries_logged_with_plan(self):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get(reverse('index'))
+        self.assertTrue(any('EXPLAIN' in line for line in logs.output))
+        self.assertTrue(all(' в index: ' in line for line in logs.output))
+
+    @override_settings(QUERY_LOG_SLOW_MS=0)
+    def test_slow_queries_logged_without_values(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get(reverse('follow_index'))
+        text = '\n'.join(logs.output)
+        self.assertIn('django_session', text)
+        self.assertNotIn(self.client.session.session_key, text)
+        self.assertNotIn('Параметры', text)
+
+    def test_disabled_by_default(self):
+        self.assertFalse(load_settings().QUERY_LOG_ENABLED)
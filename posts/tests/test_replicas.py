@@ -0,0 +1,129 @@
+import os
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, router
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings)
+
+from posts.cache import get_feed_page, remembered
+from posts.models import Post
+from yatube.db import copy_database
+from yatube.middleware import PageCacheMiddleware, ReplicaMiddleware
+from yatube.routers import reading_from_replicas
+
+User = get_user_model()
+REPLICAS = ['replica_1', 'replica_2']
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class TestReplicaRouter(SimpleTestCase):
+    def test_reads_from_primary_outside_requests(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_reads_from_replicas_when_enabled(self):
+        with reading_from_replicas():
+            self.assertIn(router.db_for_read(Post), REPLICAS)
+            self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_sessions_always_read_from_primary(self):
+        from django.contrib.sessions.models import Session
+        with reading_from_replicas():
+            self.assertEqual(router.db_for_read(Session), 'default')
+
+    def test_migrations_only_on_primary(self):
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+        self.assertFalse(router.allow_migrate('replica_1', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class TestReplicaMiddleware(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.seen = None
+
+    def view(self, request):
+        self.seen = router.db_for_read(Post)
+        return HttpResponse()
+
+    def call(self, request):
+        return ReplicaMiddleware(self.view)(request)
+
+    def test_get_reads_from_replica(self):
+        response = self.call(self.factory.get('/'))
+        self.assertIn(self.seen, REPLICAS)
+        self.assertNotIn('read_primary', response.cookies)
+
+    def test_post_pins_session_to_primary(self):
+        response = self.call(self.factory.post('/new/'))
+        self.assertEqual(self.seen, 'default')
+        self.assertEqual(
+            response.cookies['read_primary']['max-age'], 10)
+
+    def test_pinned_get_reads_from_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES['read_primary'] = '1'
+        self.call(request)
+        self.assertEqual(self.seen, 'default')
+
+    def test_failed_post_does_not_pin(self):
+        middleware = ReplicaMiddleware(
+            lambda request: HttpResponse(status=400))
+        response = middleware(self.factory.post('/new/'))
+        self.assertNotIn('read_primary', response.cookies)
+
+
+class TestCopyDatabase(TransactionTestCase):
+    # backup не завершится, пока у источника открыта транзакция TestCase.
+    def test_replica_gets_primary_rows(self):
+        author = User.objects.create_user(username='replicated')
+        Post.objects.create(text='На реплике', author=author)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'replica.sqlite3')
+            copy_database(connection, path)
+            replica = sqlite3.connect(path)
+            try:
+                texts = replica.execute(
+                    'SELECT text FROM posts_post').fetchall()
+            finally:
+                replica.close()
+        self.assertIn(('На реплике',), texts)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class TestCachesReadFromPrimary(SimpleTestCase):
+    """Кэш под версиями не наполняется с отстающих реплик."""
+
+    def setUp(self):
+        cache.clear()
+        self.seen = None
+
+    def get_page(self, number, cursor):
+        self.seen = router.db_for_read(Post)
+        return SimpleNamespace(object_list=[], number=1)
+
+    def test_feed_page_miss_reads_from_primary(self):
+        request = RequestFactory().get('/')
+        with reading_from_replicas():
+            get_feed_page(request, SimpleNamespace(get_page=self.get_page),
+                          'replicas')
+        self.assertEqual(self.seen, 'default')
+
+    def test_freshness_reads_from_primary(self):
+        with reading_from_replicas():
+            seen = remembered(lambda: router.db_for_read(Post), 'replicas')
+        self.assertEqual(seen, 'default')
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_page_cache_miss_reads_from_primary(self):
+        def view(request):
+            self.seen = router.db_for_read(Post)
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(PageCacheMiddleware(view))
+        middleware(RequestFactory().get('/'))
+        self.assertEqual(self.seen, 'default')
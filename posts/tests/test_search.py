@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.search import LikeSearch, SQLiteSearch, search_posts
+
+User = get_user_model()
+
+
+class TestSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='iskatel')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='admin')
+        cls.exact = Post.objects.create(
+            text='Дятел стучит, дятел долбит, дятел', author=cls.user)
+        cls.once = Post.objects.create(
+            text='Утром прилетел дятел', author=cls.user)
+        cls.other = Post.objects.create(text='Про воробьёв', author=cls.user)
+        cls.comment = Comment.objects.create(
+            text='Видел дятла', post=cls.other, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_ranked_by_relevance(self):
+        posts, _ = search_posts('дятел')
+        self.assertEqual(posts, [self.exact, self.once])
+
+    def test_prefix_and_comments(self):
+        posts, _ = search_posts('ДЯТЛ')
+        self.assertEqual(posts, [self.other])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = Post.objects.get(pk=self.once.pk)
+        post.text = 'Утром прилетел скворец'
+        post.save()
+        self.assertEqual(search_posts('скворец')[0], [post])
+        self.assertNotIn(post, search_posts('дятел')[0])
+        Comment.objects.get(pk=self.comment.pk).delete()
+        self.assertEqual(search_posts('дятла')[0], [])
+        Post.objects.get(pk=self.exact.pk).delete()
+        self.assertEqual(search_posts('долбит')[0], [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        for query in ('дятел OR', '"дятел', 'NEAR(', '*', ''):
+            with self.subTest(query=query):
+                search_posts(query)
+
+    def test_keyset_pages(self):
+        for i in range(15):
+            Post.objects.create(text=f'Синица номер {i}', author=self.user)
+        for backend in (SQLiteSearch(), LikeSearch()):
+            with self.subTest(backend=type(backend).__name__):
+                first, cursor = backend.search('Синица', limit=10)
+                second, last = backend.search('Синица', cursor, limit=10)
+                self.assertEqual(len(first), 10)
+                self.assertEqual(len(second), 5)
+                self.assertIsNone(last)
+                self.assertFalse(set(first) & set(second))
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'дятел'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['posts'], [self.exact, self.once])
+        self.assertContains(response, self.once.text)
+        self.assertNotContains(response, self.other.text)
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_comment_changelist'), {'q': 'дятл'})
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.comment])
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'дятел'})
+        self.assertEqual(
+            set(response.context['cl'].result_list), {self.exact, self.once})
+
+    def test_rebuild_command(self):
+        Post.objects.filter(pk=self.other.pk).update(text='Про снегирей')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search_posts('снегирей')[0], [self.other])
@@ -0,0 +1,90 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class TestSessionEngines(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='sessionny')
+
+    def session_queries(self):
+        client = Client()
+        client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse('follow_index'))
+        self.assertEqual(response.status_code, 200)
+        return [
+            query for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ]
+
+    def test_db_engine_reads_session_table(self):
+        self.assertTrue(self.session_queries())
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookies_skip_database(self):
+        self.assertEqual(self.session_queries(), [])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_cached_db_reads_from_cache(self):
+        self.assertEqual(self.session_queries(), [])
+
+    def test_benchmark_reports_session_queries(self):
+        out = StringIO()
+        call_command(
+            'benchmark_sessions', users=5, posts=60, requests=5, warmup=1,
+            backends=['db', 'signed_cookies'], stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())['backends']
+        self.assertGreater(report['db']['session_queries_mean'], 0)
+        self.assertEqual(report['signed_cookies']['session_queries_mean'], 0)
+
+
+class TestPurgeSessions(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=now - timedelta(days=1))
+        Session.objects.create(
+            session_key='alive', session_data='',
+            expire_date=now + timedelta(days=1))
+
+    def test_deletes_expired_in_batches(self):
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'purge_sessions', batch_size=2, pause=0, stdout=out)
+        self.assertIn('Удалено сессий: 5', out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['alive'])
+        deletes = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('DELETE')
+        ]
+        self.assertEqual(len(deletes), 3)
+        for query in deletes:
+            self.assertNotIn('LIMIT', query['sql'])
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_nothing_to_purge_without_database_sessions(self):
+        out = StringIO()
+        call_command('purge_sessions', stdout=out)
+        self.assertIn('удалять нечего', out.getvalue())
+        self.assertEqual(Session.objects.count(), 6)
@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts import thumbnails
+from posts.thumbnails import generate, pending, process_pending
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(dir=settings.BASE_DIR))
+class TestThumbnails(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='fotograf')
+        self.post = Post.objects.create(
+            text='С картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif')
+        )
+
+    def test_pending_post_falls_back_to_original(self):
+        response = Client().get(reverse('index'))
+        self.assertContains(response, self.post.image.url)
+
+    def test_generated_thumbnail_is_rendered(self):
+        generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+        response = Client().get(reverse('index'))
+        self.assertContains(response, self.post.thumbnail.url)
+
+    def test_variants_rendered_as_picture(self):
+        generate(self.post.pk)
+        self.post.refresh_from_db()
+        widths = [width for width, _ in self.post.variants['webp']]
+        # Картинка 2x1 не растягивается до POST_IMAGE_WIDTHS.
+        self.assertEqual(widths, [2])
+        response = Client().get(reverse('index'))
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, ' 2w"')
+        self.assertNotContains(response, '480w')
+
+    def test_image_replaced_during_generation(self):
+        def replace_then_make(image):
+            # Как post_edit: новая картинка и сброшенные копии.
+            post = Post.objects.get(pk=self.post.pk)
+            post.image = SimpleUploadedFile('new.gif', SMALL_GIF, 'image/gif')
+            post.thumbnail = ''
+            post.image_variants = ''
+            post.save()
+            return make_variants(image)
+
+        make_variants = thumbnails.make_variants
+        with mock.patch.object(
+                thumbnails, 'make_variants', side_effect=replace_then_make):
+            generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertIn('new', self.post.image.name)
+        self.assertFalse(self.post.thumbnail)
+        self.assertFalse(self.post.image_variants)
+        self.assertIn(self.post, pending())
+        generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+        self.assertNotIn(self.post, pending())
+
+    def test_variants_never_upscale(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 500)).save(buffer, 'PNG')
+        post = Post.objects.create(
+            text='Средняя картинка',
+            author=self.user,
+            image=SimpleUploadedFile('medium.png', buffer.getvalue())
+        )
+        generate(post.pk)
+        post.refresh_from_db()
+        for items in post.variants.values():
+            self.assertEqual([width for width, _ in items], [480, 960, 1000])
+            with Image.open(post.image.storage.open(items[-1][1])) as frame:
+                self.assertEqual(frame.size, (1000, 353))
+
+    def test_command_fills_pending(self):
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnail)
+        self.assertIn('Готово миниатюр: 1', out.getvalue())
+
+    def test_failed_image_leaves_queue(self):
+        broken = Post.objects.create(
+            text='Битая картинка',
+            author=self.user,
+            image=SimpleUploadedFile('broken.gif', b'not a gif', 'image/gif')
+        )
+        fresh = Post.objects.create(
+            text='Свежая картинка',
+            author=self.user,
+            image=SimpleUploadedFile('fresh.gif', SMALL_GIF, 'image/gif')
+        )
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.assertEqual(process_pending(2), (1, 1))
+            # Неудачная попытка уступает очередь свежей загрузке.
+            self.assertEqual(process_pending(1), (1, 0))
+            self.assertTrue(Post.objects.get(pk=fresh.pk).thumbnail)
+            for _ in range(settings.POST_THUMBNAIL_MAX_ATTEMPTS - 1):
+                self.assertEqual(process_pending(1), (0, 1))
+        self.assertEqual(list(pending()), [])
+        self.assertEqual(process_pending(), (0, 0))
+        out = StringIO()
+        call_command('generate_thumbnails', '--retry-failed', stdout=out)
+        self.assertIn('Возвращено в очередь: 1', out.getvalue())
+        self.assertIn(broken, pending())
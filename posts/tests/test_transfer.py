@@ -0,0 +1,98 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError
+from django.test import TestCase
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post
+from posts.search import search_posts
+
+User = get_user_model()
+MODELS = ('group', 'post', 'comment', 'follow')
+
+
+class TestTransfer(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='perevozchik')
+        cls.reader = User.objects.create_user(username='chitatel')
+        cls.group = Group.objects.create(
+            title='Перенос', slug='perenos', description='Группа')
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Перенесённый пост {i}', author=cls.author,
+                group=cls.group if i % 2 else None)
+            Comment.objects.create(
+                text=f'Комментарий {i}', post=post, author=cls.reader)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def snapshot(self):
+        return (
+            list(Group.objects.values_list('slug', 'title', 'description')),
+            list(Post.objects.values_list(
+                'id', 'text', 'pub_date', 'author__username', 'group__slug',
+                'comments_count')),
+            list(Comment.objects.values_list(
+                'id', 'post_id', 'author__username', 'text', 'created')),
+            list(Follow.objects.values_list(
+                'user__username', 'author__username')),
+        )
+
+    def export(self, fmt):
+        paths = {}
+        for model in MODELS:
+            paths[model] = os.path.join(self.dir.name, f'{model}.{fmt}')
+            call_command('export_data', model, output=paths[model],
+                         chunk_size=2, stderr=StringIO())
+        return paths
+
+    def load(self, paths, **options):
+        for model in MODELS:
+            call_command('import_data', model, paths[model], batch_size=2,
+                         stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_round_trip(self):
+        for fmt in ('jsonl', 'csv'):
+            with self.subTest(fmt=fmt):
+                before = self.snapshot()
+                paths = self.export(fmt)
+                User.objects.exclude(pk=self.author.pk).delete()
+                Group.objects.all().delete()
+                Post.objects.all().delete()
+                self.load(paths)
+                self.assertEqual(self.snapshot(), before)
+                reader = User.objects.get(username='chitatel')
+                self.assertEqual(reader.counters.following_count, 1)
+                self.assertEqual(
+                    FeedEntry.objects.filter(user=reader).count(), 5)
+                self.assertEqual(len(search_posts('перенесённый')[0]), 5)
+                # Импорт с явными id сдвигает последовательность ключа.
+                created = Post.objects.create(text='После', author=reader)
+                self.assertGreater(created.pk, max(before[1])[0])
+                created.delete()
+
+    def test_skip_existing(self):
+        before = self.snapshot()
+        paths = self.export('jsonl')
+        with self.assertRaises(IntegrityError):
+            self.load(paths)
+        self.load(paths, skip_existing=True)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_unknown_group(self):
+        paths = self.export('jsonl')
+        Group.objects.all().delete()
+        Post.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'post', paths['post'],
+                         stdout=StringIO(), stderr=StringIO())
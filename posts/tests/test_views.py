@@ -5,10 +5,12 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
 
@@ -232,3 +234,49 @@ class TestViews(TestCase):
         response = self.authorized_client.get(reverse('follow_index'))
         context = response.context['page']
         self.assertEqual(len(context), 0)
+
+
+class TestFeedQueries(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='pisatel')
+        cls.reader = User.objects.create_user(username='chitatel')
+        cls.group = Group.objects.create(
+            title='Запросы',
+            slug='queries',
+            description='Группа для подсчёта запросов'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(
+                text=f'Пост {i}',
+                author=self.user,
+                group=self.group
+            )
+            Comment.objects.create(post=post, author=self.reader, text='ок')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_feed_queries_do_not_grow_with_page_size(self):
+        """Число запросов ленты не зависит от числа карточек."""
+        urls = (
+            reverse('index'),
+            reverse('group_posts', args=(self.group.slug,)),
+            reverse('profile', args=(self.user.username,)),
+            reverse('follow_index'),
+        )
+        self.create_posts(1)
+        expected = {url: self.count_queries(url) for url in urls}
+        self.create_posts(9)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), expected[url])
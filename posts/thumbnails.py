@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F
+from PIL import Image, ImageOps
+from sorl.thumbnail import get_thumbnail
+
+from yatube import page_cache
+
+from . import cache
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+def pending():
+    """
+    Посты с картинкой, для которых миниатюра ещё не готова. Картинки,
+    на которых генерация упала POST_THUMBNAIL_MAX_ATTEMPTS раз, сюда не
+    попадают, иначе они навсегда заняли бы начало очереди.
+    """
+    return Post.objects.exclude(image='').exclude(
+        image__isnull=True).filter(
+            thumbnail='',
+            thumbnail_attempts__lt=settings.POST_THUMBNAIL_MAX_ATTEMPTS)
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only('id', 'image').first()
+    if post is None or not post.image:
+        return
+    thumbnail = get_thumbnail(
+        post.image, settings.POST_THUMBNAIL_GEOMETRY,
+        crop='center', upscale=True
+    )
+    variants = make_variants(post.image)
+    # Пока делались копии, автор мог заменить картинку: post_edit уже
+    # сбросил поля, и новую картинку возьмёт следующий проход. Запись
+    # только при той же картинке, иначе старые копии легли бы поверх.
+    updated = Post.objects.filter(pk=post.pk, image=post.image.name).update(
+        thumbnail=thumbnail.name, image_variants=json.dumps(variants))
+    if updated:
+        # update() не шлёт сигналов, кэши сбрасываются здесь.
+        cache.bump_feed_version()
+        page_cache.purge(f'post:{post.pk}')
+
+
+def supported_formats():
+    Image.init()
+    return [fmt for fmt in settings.POST_IMAGE_FORMATS
+            if fmt.upper() in Image.SAVE]
+
+
+def variant_widths(source_width, source_height, width, height):
+    """
+    Ширины из POST_IMAGE_WIDTHS, которые кадр пропорций width x height
+    получает из исходника без увеличения. Если исходник уже самой
+    большой из них, последним идёт кадр в его полный размер.
+    """
+    largest = min(source_width, source_height * width // height)
+    widths = [size for size in settings.POST_IMAGE_WIDTHS if size < largest]
+    if largest <= max(settings.POST_IMAGE_WIDTHS):
+        widths.append(max(largest, 1))
+    return widths
+
+
+def make_variants(image):
+    """
+    Сохраняет рядом с оригиналом кадрированные копии нескольких ширин
+    в каждом поддерживаемом формате и возвращает их список по форматам.
+    Маленькие картинки не растягиваются: ширины больше исходника
+    пропускаются.
+    """
+    width, height = map(int, settings.POST_THUMBNAIL_GEOMETRY.split('x'))
+    stem, _ = os.path.splitext(image.name)
+    variants = {}
+    with image.open('rb'), Image.open(image) as source:
+        source = ImageOps.exif_transpose(source)
+        widths = variant_widths(*source.size, width, height)
+        for fmt in supported_formats():
+            variants[fmt] = []
+            for size in widths:
+                frame = ImageOps.fit(
+                    source, (size, max(round(size * height / width), 1)),
+                    Image.LANCZOS
+                )
+                if fmt == 'jpeg' and frame.mode != 'RGB':
+                    frame = frame.convert('RGB')
+                buffer = BytesIO()
+                frame.save(buffer, fmt.upper(), quality=80)
+                name = image.storage.save(
+                    f'{stem}_{size}w.{fmt}', ContentFile(buffer.getvalue()))
+                variants[fmt].append((size, name))
+    return variants
+
+
+def process_pending(limit=None):
+    """Возвращает (готово, не удалось)."""
+    done = failed = 0
+    # Повторные попытки — после свежих загрузок.
+    ids = pending().order_by('thumbnail_attempts', 'id').values_list(
+        'id', flat=True)[:limit]
+    for post_id in ids:
+        try:
+            generate(post_id)
+        except Exception:
+            logger.exception('Не удалось сделать миниатюру поста %s', post_id)
+            Post.objects.filter(pk=post_id).update(
+                thumbnail_attempts=F('thumbnail_attempts') + 1)
+            failed += 1
+            continue
+        done += 1
+    return done, failed
+
+
+def retry_failed():
+    """Возвращает в очередь картинки, исчерпавшие попытки."""
+    return Post.objects.filter(
+        thumbnail='',
+        thumbnail_attempts__gte=settings.POST_THUMBNAIL_MAX_ATTEMPTS
+    ).update(thumbnail_attempts=0)
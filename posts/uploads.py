@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import (
+    SkipFile, TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageOps
+
+# Форматы, в которых обычно лежат EXIF с геометкой и моделью камеры.
+REENCODE_FORMATS = {'JPEG': 'image/jpeg', 'MPO': 'image/jpeg',
+                    'WEBP': 'image/webp', 'TIFF': 'image/tiff'}
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет загрузку на диск кусками и бросает файл, как только он
+    превысил POST_IMAGE_MAX_BYTES: ни память, ни диск не растут вместе
+    с размером присланного файла. Остаток тела дочитывается, остальные
+    поля формы приходят как обычно, а имя поля брошенного файла
+    остаётся в request.skipped_uploads для формы.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            self.request.skipped_uploads = (
+                skipped_uploads(self.request) | {self.field_name})
+            raise SkipFile
+        self.file.write(raw_data)
+
+
+def skipped_uploads(request):
+    """Поля файлов, брошенных LimitedUploadHandler; тело уже разобрано."""
+    return getattr(request, 'skipped_uploads', frozenset())
+
+
+def too_large():
+    limit = filesizeformat(settings.POST_IMAGE_MAX_BYTES)
+    return ValidationError(f'Картинка больше {limit}')
+
+
+def validate_image(upload):
+    if upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise too_large()
+    # Image.open читает только заголовок, пиксели не декодируются.
+    with Image.open(upload) as image:
+        width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            f'Картинка {width}x{height} слишком большая по числу пикселей')
+    upload.seek(0)
+
+
+def strip_metadata(upload):
+    """
+    Перекодирует фото без EXIF, предварительно повернув его по EXIF.
+    Для JPEG draft() декодирует сразу в уменьшенном масштабе, так что
+    в памяти не бывает больше POST_IMAGE_MAX_SIDE² пикселей.
+    """
+    side = settings.POST_IMAGE_MAX_SIDE
+    with Image.open(upload) as image:
+        content_type = REENCODE_FORMATS.get(image.format)
+        if content_type is None:
+            upload.seek(0)
+            return upload
+        fmt = 'JPEG' if image.format == 'MPO' else image.format
+        image.draft('RGB', (side, side))
+        clean = ImageOps.exif_transpose(image)
+        clean.thumbnail((side, side), Image.LANCZOS)
+        # Результат держится в памяти только до FILE_UPLOAD_MAX_MEMORY_SIZE,
+        # дальше уходит в безымянный временный файл.
+        output = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        clean.save(output, fmt, quality=90)
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(
+        output, os.path.basename(upload.name), content_type, size)
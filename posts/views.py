@@ -1,28 +1,43 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls.base import reverse
 
+from yatube import page_cache
+
+from .cache import card_tags, follow_version, get_feed_page
+from .conditional import (
+    conditional_page, follow_freshness, group_freshness, index_freshness,
+    post_freshness, profile_freshness)
+from .counters import counters_for
+from .feed import follow_feed
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
+from .paginators import CursorPaginator
+from .search import search_posts
+from .uploads import skipped_uploads
 
 
+@conditional_page(index_freshness)
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = Post.objects.for_feed()
+    paginator = CursorPaginator(posts, 10)
+    page = get_feed_page(request, paginator, 'index')
+    page_cache.tag(request, 'list:index', *card_tags(page.object_list))
     return render(request, 'index.html', {
         'page': page,
     })
 
 
+@conditional_page(group_freshness)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    paginator = CursorPaginator(posts, 10)
+    page = get_feed_page(request, paginator, 'group', group.pk)
+    page_cache.tag(
+        request, f'list:group:{slug}', f'group:{slug}',
+        *card_tags(page.object_list))
     return render(request, 'group.html', {
         'page': page,
         'group': group,
@@ -35,11 +50,13 @@ def new_post(request):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=author_post
+        instance=author_post,
+        skipped_uploads=skipped_uploads(request)
     )
     if not form.is_valid():
         return render(request, 'new_post.html', {'form': form})
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('index')
 
 
@@ -51,10 +68,16 @@ def post_edit(request, username, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        skipped_uploads=skipped_uploads(request)
     )
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        if 'image' in form.changed_data:
+            post.thumbnail = ''
+            post.image_variants = ''
+        with transaction.atomic():
+            post.save()
         return redirect(reverse('post', args=(username, post_id)))
     return render(request, 'new_post.html', {
         'form': form,
@@ -62,32 +85,42 @@ def post_edit(request, username, post_id):
     })
 
 
+@conditional_page(profile_freshness)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
     following = False
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user, author=author).exists()
-    posts = author.posts.all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = author.posts.for_feed()
+    paginator = CursorPaginator(posts, 10)
+    page = get_feed_page(request, paginator, 'profile', author.pk)
+    page_cache.tag(
+        request, f'list:author:{author.pk}', f'profile:{author.pk}',
+        f'author:{author.pk}', *card_tags(page.object_list))
     return render(request, 'profile.html', {
         'author': author,
+        'counters': counters_for(author),
         'page': page,
         'following': following
     })
 
 
+@conditional_page(post_freshness)
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.for_feed(), id=post_id, author__username=username)
+    comments = post.comments.select_related('author')
+    page_cache.tag(
+        request, f'profile:{post.author_id}', *card_tags([post]),
+        *(f'author:{comment.author_id}' for comment in comments))
     form = CommentForm(
         request.POST or None,
     )
     return render(request, 'post.html', {
         'post': post,
         'author': post.author,
+        'counters': counters_for(post.author),
         'form': form,
         'comments': comments
     })
@@ -103,11 +136,22 @@ def add_comment(request, username, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
 
     return redirect(reverse('post', args=(username, post_id)))
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts, next_cursor = search_posts(query, request.GET.get('cursor'))
+    return render(request, 'search.html', {
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
+    })
+
+
 def page_not_found(request, exception):
     return render(
         request,
@@ -122,11 +166,13 @@ def server_error(request):
 
 
 @login_required
+@conditional_page(follow_freshness)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user).all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = follow_feed(request.user).for_feed()
+    paginator = CursorPaginator(posts, 10, field='feed_date', pk='feed_id')
+    page = get_feed_page(
+        request, paginator,
+        'follow', request.user.pk, follow_version(request.user.pk))
     return render(request, 'follow.html', {
         'page': page,
         'paginator': paginator
@@ -137,14 +183,14 @@ def follow_index(request):
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if author != request.user:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect(reverse('profile', args=(username,)))
 
 
 @login_required
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    obj = Follow.objects.filter(user=request.user, author=author)
-    if obj.exists():
-        obj.delete()
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect(reverse('profile', args=(username,)))
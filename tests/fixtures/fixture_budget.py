@@ -0,0 +1,9 @@
+import pytest
+
+from posts.tests.budgets import within_budget
+
+
+@pytest.fixture
+def query_budget(db):
+    """Контекстный менеджер: query_budget('index') проверяет бюджет из setup.cfg."""
+    return within_budget
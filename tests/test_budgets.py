@@ -0,0 +1,18 @@
+import pytest
+from django.core.cache import cache
+
+
+class TestBudgets:
+
+    @pytest.mark.parametrize('name, url', [
+        ('index', '/'),
+        ('group_posts', '/group/test-link/'),
+        ('profile', '/TestUser/'),
+        ('follow_index', '/follow/'),
+    ])
+    def test_feed_within_budget(self, name, url, user_client, few_posts_with_group,
+                                another_few_posts_with_group_with_follower, query_budget):
+        cache.clear()
+        with query_budget(name):
+            response = user_client.get(url)
+        assert response.status_code == 200, f'Страница `{url}` не открывается'
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class YatubeConfig(AppConfig):
+    name = 'yatube'
+
+    def ready(self):
+        from . import db  # noqa
@@ -0,0 +1,19 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``: Django's WSGI handler run in a thread pool of
+ASGI_THREADS threads, see yatube/asgi_adapter.py. Serve it with any
+ASGI server, e.g. ``uvicorn yatube.asgi:application --workers 4``.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from yatube.asgi_adapter import ASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = ASGIHandler(get_wsgi_application(), settings.ASGI_THREADS)
@@ -0,0 +1,124 @@
+"""
+ASGI-приложение поверх WSGI-обработчика Django.
+
+В Django 2.2 нет ни ASGI-обработчика, ни асинхронных представлений,
+поэтому адаптер делает то же, что sync_to_async: соединения, чтение
+тела и отправку ответа ведёт цикл событий, а сам запрос Django
+выполняется в ограниченном пуле потоков. Медленный запрос занимает
+один поток пула, а не процесс целиком, как у sync-воркера gunicorn.
+Соединения с базой у каждого потока свои и закрываются сигналом
+request_finished, как и под WSGI.
+
+Ответ собирается в память целиком; потоковые ответы (FileResponse
+медиафайлов при DEBUG) отдаются одним куском.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI передаёт путь байтами в latin-1, Django перекодирует его.
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in environ:
+            value = f'{environ[key]},{value}'
+        environ[key] = value
+    return environ
+
+
+def run_wsgi(application, environ):
+    """Выполняет WSGI-запрос: (статус, заголовки ASGI, тело)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ]
+
+    response = application(environ, start_response)
+    try:
+        body = b''.join(response)
+    finally:
+        # close() шлёт request_finished: закрываются соединения с базой.
+        if hasattr(response, 'close'):
+            response.close()
+    return started['status'], started['headers'], body
+
+
+class ASGIHandler:
+    def __init__(self, wsgi_application, threads=None, executor=None):
+        self.wsgi_application = wsgi_application
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def http(self, scope, receive, send):
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        status, headers, content = await loop.run_in_executor(
+            self.executor, run_wsgi, self.wsgi_application,
+            build_environ(scope, body))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': content})
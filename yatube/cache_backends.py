@@ -0,0 +1,250 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+# SQLite ограничивает число параметров в одном запросе.
+CHUNK_SIZE = 500
+ALIVE = '(expires IS NULL OR expires > ?)'
+MISSING = object()
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кэш в отдельном файле SQLite в режиме WAL.
+
+    В отличие от LocMemCache, записи и инвалидация видны всем процессам
+    gunicorn, а incr() атомарен между процессами, в отличие от
+    FileBasedCache. LOCATION — путь к файлу кэша.
+    """
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = os.path.abspath(location)
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None,
+                check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def get(self, key, default=None, version=None):
+        row = self._connection.execute(
+            f'SELECT value FROM cache WHERE key = ? AND {ALIVE}',
+            (self._key(key, version), time.time())
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        found = {}
+        batch = list(names)
+        for start in range(0, len(batch), CHUNK_SIZE):
+            chunk = batch[start:start + CHUNK_SIZE]
+            marks = ', '.join('?' * len(chunk))
+            rows = self._connection.execute(
+                f'SELECT key, value FROM cache '
+                f'WHERE key IN ({marks}) AND {ALIVE}',
+                (*chunk, time.time())
+            )
+            for name, value in rows:
+                found[names[name]] = pickle.loads(value)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._connection.execute(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            (self._key(key, version), self._dumps(value),
+             self.get_backend_timeout(timeout))
+        )
+        self._written(1)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            ((self._key(key, version), self._dumps(value), expires)
+             for key, value in data.items())
+        )
+        self._written(len(data))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                f'DELETE FROM cache WHERE key = ? AND NOT {ALIVE}',
+                (key, time.time())
+            )
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+                (key, self._dumps(value), self.get_backend_timeout(timeout))
+            ).rowcount == 1
+        finally:
+            connection.execute('COMMIT')
+        if added:
+            self._written(1)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self._connection
+        # BEGIN IMMEDIATE берёт блокировку записи до чтения, поэтому
+        # параллельные incr() из разных процессов не теряют обновления.
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {ALIVE}',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (self._dumps(value), key)
+            )
+        finally:
+            connection.execute('COMMIT')
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._connection.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time())
+        ).rowcount == 1
+
+    def has_key(self, key, version=None):
+        return self._connection.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            (self._key(key, version), time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self._connection.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def delete_many(self, keys, version=None):
+        self._connection.executemany(
+            'DELETE FROM cache WHERE key = ?',
+            ((self._key(key, version),) for key in keys)
+        )
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
+
+    def _written(self, count):
+        # Считать строки на каждую запись дорого, поэтому лимит
+        # MAX_ENTRIES проверяется примерно раз в сотню записей.
+        self._writes += count
+        if self._writes >= 100:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        connection = self._connection
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        total = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+        connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY expires IS NULL, expires '
+            'LIMIT ?)',
+            (total // self._cull_frequency,)
+        )
+
+
+class MeteredCache(BaseCache):
+    """
+    Обёртка над любым бэкендом кэша, которая считает попадания и
+    промахи для yatube.metrics. Настоящий бэкенд задаётся ключом
+    INNER_BACKEND, остальные параметры передаются ему как есть.
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        inner = import_string(params.pop('INNER_BACKEND'))
+        super().__init__(params)
+        self._cache = inner(location, params)
+
+    def get(self, key, default=None, version=None):
+        value = self._cache.get(key, MISSING, version)
+        if value is MISSING:
+            metrics.record_cache(0, 1)
+            return default
+        metrics.record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self._cache.get_many(keys, version)
+        metrics.record_cache(len(found), len(keys) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        return self._cache.has_key(key, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.add(key, value, timeout, version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.set(key, value, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.set_many(data, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.touch(key, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._cache.incr(key, delta, version)
+
+    def decr(self, key, delta=1, version=None):
+        return self._cache.decr(key, delta, version)
+
+    def delete(self, key, version=None):
+        return self._cache.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        return self._cache.delete_many(keys, version)
+
+    def clear(self):
+        return self._cache.clear()
+
+    def close(self, **kwargs):
+        return self._cache.close(**kwargs)
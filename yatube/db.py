@@ -0,0 +1,57 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.backends.signals import connection_created
+from django.db import connection, connections
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """
+    Режим «боевого» SQLite: каждое новое соединение получает PRAGMA из
+    SQLITE_PRAGMAS. WAL не даёт писателю блокировать читателей, а
+    busy_timeout заставляет ждать блокировку, а не сразу падать.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRODUCTION:
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def copy_database(connection, path):
+    """
+    Согласованный снимок базы SQLite в файл path через backup API:
+    читатели реплики во время копирования видят старую версию целиком.
+    """
+    connection.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+
+
+@contextmanager
+def temporary_database():
+    """
+    Подменяет базу default свежей мигрированной SQLite во временном
+    каталоге. Словарь настроек общий для всех соединений default, так
+    что подмену видят и потоки, и процессы, порождённые через fork.
+    """
+    original = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        connections.close_all()
+        connection.settings_dict['NAME'] = os.path.join(
+            directory, 'benchmark.sqlite3')
+        try:
+            call_command('migrate', verbosity=0)
+            yield
+        finally:
+            connections.close_all()
+            connection.settings_dict['NAME'] = original
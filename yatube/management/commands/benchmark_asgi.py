@@ -0,0 +1,259 @@
+import asyncio
+import json
+import multiprocessing
+import random
+import socket
+import time
+from http import HTTPStatus
+from urllib.parse import unquote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.urls import reverse
+
+from posts.management.commands.benchmark_views import PERCENTILES, percentile
+from posts.models import Group, Post, User
+from posts.seed import seed
+from yatube.asgi_adapter import ASGIHandler
+from yatube.db import temporary_database
+
+MODES = ('wsgi', 'asgi')
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def application(io_delay):
+    """WSGI-приложение; io_delay имитирует блокирующее ожидание."""
+    settings.DEBUG = False
+    wsgi = get_wsgi_application()
+    if not io_delay:
+        return wsgi
+
+    def delayed(environ, start_response):
+        time.sleep(io_delay)
+        return wsgi(environ, start_response)
+    return delayed
+
+
+def serve_wsgi(sock, options):
+    """Однопоточный воркер, как sync-воркер gunicorn."""
+    server = WSGIServer(
+        sock.getsockname(), QuietHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = sock
+    server.server_name, server.server_port = sock.getsockname()
+    server.setup_environ()
+    server.set_app(application(options['io_delay_ms'] / 1000))
+    server.serve_forever()
+
+
+async def handle_asgi(app, reader, writer):
+    """Минимальный HTTP/1.1 без keep-alive: только для замера."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+        return
+    request_line, *lines = head.decode('latin-1').split('\r\n')
+    method, target, version = request_line.split(' ')
+    headers = [
+        tuple(part.strip() for part in line.split(':', 1))
+        for line in lines if line
+    ]
+    length = int(dict(
+        (name.lower(), value) for name, value in headers
+    ).get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+    path, _, query = target.partition('?')
+    messages = [{'type': 'http.request', 'body': body}]
+    response = {'body': []}
+
+    async def receive():
+        return messages.pop() if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response.update(message)
+        else:
+            response['body'].append(message.get('body', b''))
+
+    await app({
+        'type': 'http',
+        'http_version': version.split('/')[1],
+        'method': method,
+        'path': unquote(path),
+        'query_string': query.encode('latin-1'),
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in headers
+        ],
+        'client': writer.get_extra_info('peername')[:2],
+        'server': writer.get_extra_info('sockname')[:2],
+    }, receive, send)
+    content = b''.join(response['body'])
+    status = response['status']
+    head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}']
+    head += [
+        f'{name.decode("latin-1")}: {value.decode("latin-1")}'
+        for name, value in response['headers']
+        if name != b'content-length'
+    ]
+    head += [f'Content-Length: {len(content)}', 'Connection: close']
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+    writer.write(content)
+    await writer.drain()
+    writer.close()
+
+
+def serve_asgi(sock, options):
+    app = ASGIHandler(
+        application(options['io_delay_ms'] / 1000), options['threads'])
+
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_asgi(app, reader, writer),
+            sock=sock)
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def load(port, urls, options):
+    """options['connections'] клиентов шлют запросы без пауз."""
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + options['duration']
+    timings, errors = [], 0
+
+    async def client(number):
+        nonlocal errors
+        rng = random.Random(number)
+        while loop.time() < deadline:
+            started = time.perf_counter()
+            try:
+                reader, writer = await asyncio.open_connection(
+                    '127.0.0.1', port)
+                writer.write(
+                    f'GET {rng.choice(urls)} HTTP/1.1\r\n'
+                    'Host: localhost\r\nConnection: close\r\n\r\n'.encode())
+                await writer.drain()
+                data = await reader.read()
+                writer.close()
+                status = int(data.split(b' ', 2)[1])
+            except (OSError, IndexError, ValueError):
+                errors += 1
+                continue
+            if status == 200:
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(
+        client(number) for number in range(options['connections'])))
+    return timings, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность при множестве одновременных '
+        'соединений: однопоточные WSGI-воркеры (как sync-воркеры '
+        'gunicorn) против ASGI-адаптера yatube.asgi с пулом потоков. '
+        'Гоняет index, group_posts, profile и post на временной базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Процессов сервера в каждом режиме'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS,
+            help='Потоков пула в каждом ASGI-процессе'
+        )
+        parser.add_argument('--connections', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument(
+            '--io-delay-ms', type=float, default=0,
+            help='Блокирующая пауза в каждом запросе: ожидание блокировки '
+                 'базы, диска или внешнего сервиса'
+        )
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результатов, по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            seed(users=options['users'], groups=5, posts=options['posts'],
+                 comments=options['posts'], follows=10)
+            urls = self.urls()
+            connections.close_all()
+            results = {
+                mode: self.measure(mode, urls, options) for mode in MODES}
+        report = {
+            'meta': {key: options[key] for key in (
+                'workers', 'threads', 'connections', 'duration',
+                'io_delay_ms', 'users', 'posts')},
+            'modes': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(text)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text + '\n')
+
+    def urls(self):
+        urls = [reverse('index')]
+        urls += [
+            reverse('group_posts', args=(slug,))
+            for slug in Group.objects.values_list('slug', flat=True)]
+        urls += [
+            reverse('profile', args=(username,))
+            for username in User.objects.values_list(
+                'username', flat=True)[:20]]
+        urls += [
+            reverse('post', args=(post.author.username, post.pk))
+            for post in Post.objects.select_related('author')[:20]]
+        return urls
+
+    def measure(self, mode, urls, options):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        sock.listen(1024)
+        serve = serve_wsgi if mode == 'wsgi' else serve_asgi
+        context = multiprocessing.get_context('fork')
+        servers = [
+            context.Process(target=serve, args=(sock, options), daemon=True)
+            for _ in range(options['workers'])
+        ]
+        for server in servers:
+            server.start()
+        try:
+            timings, errors = asyncio.run(
+                load(sock.getsockname()[1], urls, options))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.join()
+            sock.close()
+        timings.sort()
+        result = {
+            'requests_per_second': round(
+                len(timings) / options['duration'], 1),
+            'errors': errors,
+        }
+        if timings:
+            result.update({
+                f'p{percent}_ms': round(percentile(timings, percent), 3)
+                for percent in PERCENTILES
+            })
+        self.stderr.write(f'{mode}: {result}')
+        return result
@@ -0,0 +1,113 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.management.commands.benchmark_views import PERCENTILES, percentile
+from posts.models import Post
+from posts.seed import seed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает хранилища сессий из SESSION_ENGINES на запросах '
+        'вошедших пользователей к follow_index и post: задержку, число '
+        'запросов к базе и сколько из них к django_session. Все '
+        'изменения откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Сколько замеряемых запросов на хранилище'
+        )
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument(
+            '--backends', nargs='+', choices=tuple(settings.SESSION_ENGINES),
+            default=tuple(settings.SESSION_ENGINES))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результатов, по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        with transaction.atomic(), override_settings(DEBUG=False):
+            data = seed(users=options['users'], groups=5,
+                        posts=options['posts'], comments=options['posts'],
+                        follows=10, random_seed=options['seed'])
+            self.users = list(User.objects.filter(pk__in=data.users))
+            self.urls = [reverse('follow_index')] + [
+                reverse('post', args=(post.author.username, post.pk))
+                for post in Post.objects.select_related('author').filter(
+                    pk__in=self.rng.sample(data.posts, 50))
+            ]
+            results = {
+                backend: self.measure(backend, options)
+                for backend in options['backends']
+            }
+            transaction.set_rollback(True)
+        text = json.dumps({'backends': results}, ensure_ascii=False,
+                          indent=2)
+        if options['output'] == '-':
+            self.stdout.write(text)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text + '\n')
+
+    def request(self, clients):
+        client = self.rng.choice(clients)
+        url = self.rng.choice(self.urls)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code}')
+        session = sum(
+            'django_session' in query['sql']
+            for query in queries.captured_queries)
+        return elapsed, len(queries), session
+
+    def measure(self, backend, options):
+        engine = settings.SESSION_ENGINES[backend]
+        with override_settings(SESSION_ENGINE=engine):
+            clients = []
+            for user in self.rng.sample(self.users, min(10, len(self.users))):
+                client = Client()
+                client.force_login(user)
+                clients.append(client)
+            for _ in range(options['warmup']):
+                self.request(clients)
+            samples = [
+                self.request(clients) for _ in range(options['requests'])]
+        timings = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        result = {
+            f'p{percent}_ms': round(percentile(timings, percent), 3)
+            for percent in PERCENTILES
+        }
+        result.update(
+            mean_ms=round(sum(timings) / len(timings), 3),
+            queries_mean=round(
+                sum(count for _, count, _ in samples) / len(samples), 2),
+            session_queries_mean=round(
+                sum(session for _, _, session in samples) / len(samples), 2),
+        )
+        self.stderr.write(
+            f'{backend}: p50 {result["p50_ms"]} мс, '
+            f'запросов {result["queries_mean"]}, '
+            f'к сессиям {result["session_queries_mean"]}'
+        )
+        return result
@@ -0,0 +1,148 @@
+import json
+import math
+import multiprocessing
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+
+from posts.models import Post
+from posts.seed import WORDS, seed
+from yatube.db import temporary_database
+
+# Режим без WAL идёт первым: journal_mode=WAL сохраняется в файле базы.
+MODES = ('default', 'production')
+
+
+def p95(values):
+    values = sorted(values)
+    return values[math.ceil(len(values) * 0.95) - 1] if values else None
+
+
+def run_thread(deadline, options, production, ids, rng, stats):
+    while time.perf_counter() < deadline:
+        write = rng.random() < options['write_ratio']
+        started = time.perf_counter()
+        try:
+            if write:
+                with transaction.atomic():
+                    Post.objects.create(
+                        text=' '.join(rng.choices(WORDS, k=8)),
+                        author_id=rng.choice(ids['users']))
+            else:
+                list(Post.objects.for_feed().filter(
+                    pk__lt=rng.choice(ids['posts']))[:10])
+        except OperationalError:
+            stats['errors'] += 1
+        else:
+            kind = 'writes' if write else 'reads'
+            stats[kind].append(time.perf_counter() - started)
+        if not production:
+            # CONN_MAX_AGE=0: база открывается заново на каждый запрос.
+            connection.close()
+    connection.close()
+
+
+def run_worker(number, production, options, ids, queue):
+    """Процесс-воркер в духе gunicorn --workers N --threads M."""
+    settings.SQLITE_PRODUCTION = production
+    deadline = time.perf_counter() + options['duration']
+    stats = []
+    threads = []
+    for thread_number in range(options['threads']):
+        thread_stats = {'reads': [], 'writes': [], 'errors': 0}
+        rng = random.Random(number * 1000 + thread_number)
+        thread = threading.Thread(
+            target=run_thread,
+            args=(deadline, options, production, ids, rng, thread_stats))
+        thread.start()
+        threads.append(thread)
+        stats.append(thread_stats)
+    for thread in threads:
+        thread.join()
+    queue.put(stats)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite с настройками по '
+        'умолчанию и в режиме SQLITE_PRODUCTION при параллельных чтениях '
+        'и записях из нескольких процессов и потоков, как у gunicorn. '
+        'Работает на временной копии схемы, рабочая база не меняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Сколько секунд длится замер каждого режима'
+        )
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.1,
+            help='Доля операций записи'
+        )
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для результатов, по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            ids = self.prepare(options)
+            results = {
+                mode: self.measure(mode == 'production', options, ids)
+                for mode in MODES
+            }
+        report = {
+            'meta': {key: options[key] for key in (
+                'workers', 'threads', 'duration', 'write_ratio', 'users',
+                'posts')},
+            'modes': results,
+        }
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(text)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                stream.write(text + '\n')
+
+    def prepare(self, options):
+        data = seed(users=options['users'], groups=5, posts=options['posts'],
+                    comments=options['posts'], follows=10)
+        connections.close_all()
+        return {'users': data.users, 'posts': data.posts}
+
+    def measure(self, production, options, ids):
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [
+            context.Process(
+                target=run_worker,
+                args=(number, production, options, ids, queue))
+            for number in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        stats = [
+            thread for _ in workers for thread in queue.get()]
+        for worker in workers:
+            worker.join()
+        reads = [value for thread in stats for value in thread['reads']]
+        writes = [value for thread in stats for value in thread['writes']]
+        duration = options['duration']
+        result = {
+            'reads_per_second': round(len(reads) / duration, 1),
+            'writes_per_second': round(len(writes) / duration, 1),
+            'errors': sum(thread['errors'] for thread in stats),
+            'read_p95_ms': p95(reads) and round(p95(reads) * 1000, 3),
+            'write_p95_ms': p95(writes) and round(p95(writes) * 1000, 3),
+        }
+        self.stderr.write(
+            f'{"production" if production else "default"}: {result}')
+        return result
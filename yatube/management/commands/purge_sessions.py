@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+DB_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии из базы пачками. В отличие от '
+        'clearsessions, каждая пачка — отдельный короткий DELETE, и между '
+        'ними запросы сайта успевают получить блокировку.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пачками в секундах'
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in DB_ENGINES:
+            self.stdout.write(
+                f'{settings.SESSION_ENGINE} не хранит сессии в базе, '
+                'удалять нечего.')
+            return
+        # Граница фиксируется заранее, чтобы команда не гонялась за
+        # сессиями, истекающими во время работы.
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        deleted = 0
+        while True:
+            # Ключи читаются отдельным запросом: MySQL не принимает LIMIT
+            # в подзапросе IN (...).
+            keys = list(expired.values_list(
+                'session_key', flat=True)[:options['batch_size']])
+            if keys:
+                count, _ = Session.objects.filter(
+                    session_key__in=keys).delete()
+                deleted += count
+            if len(keys) < options['batch_size']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from yatube.db import copy_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite во все реплики DATABASE_REPLICAS. '
+        'С --interval повторяет копирование, пока не остановят.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Пауза между копированиями в секундах'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Команда копирует только SQLite, для других баз '
+                'используйте их собственную репликацию.'
+            )
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не настроены: задайте '
+                               'REPLICA_DATABASES.')
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                # Соединение реплики закрывается, чтобы backup не ждал
+                # его блокировки.
+                connections[alias].close()
+                started = time.perf_counter()
+                copy_database(connection, connections[alias].settings_dict[
+                    'NAME'])
+                self.stdout.write(
+                    f'{alias}: {time.perf_counter() - started:.2f} с')
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
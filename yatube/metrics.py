@@ -0,0 +1,199 @@
+"""
+Метрики запросов: время в базе, число запросов, время рендеринга
+шаблонов и попадания в кэш.
+
+Замеры текущего запроса копятся в RequestStats, который
+MetricsMiddleware кладёт в contextvar; база, шаблоны и кэш пишут в
+него, только пока он есть. Итоги складываются в гистограммы по имени
+URL внутри процесса и отдаются на /metrics/ в текстовом формате
+Prometheus. У каждого воркера gunicorn свои счётчики.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from .query_log import query_log
+
+# Границы корзин гистограммы длительности запроса, в секундах.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'template_time', 'cache_hits',
+                 'cache_misses', 'rendering')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rendering = False
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+            f'total;dur={total * 1000:.1f}',
+        ))
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    stats = RequestStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper()."""
+    stats = current()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started
+
+
+def record_cache(hits, misses):
+    stats = current()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+@contextmanager
+def template_timer():
+    # Вложенные шаблоны (include, карточки ленты) рендерятся внутри
+    # внешнего, поэтому время считается только у самого внешнего.
+    stats = current()
+    if stats is None or stats.rendering:
+        yield
+        return
+    stats.rendering = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.template_time += time.perf_counter() - started
+        stats.rendering = False
+
+
+class ViewMetrics:
+    __slots__ = ('buckets', 'count', 'duration', 'queries', 'db_time',
+                 'template_time', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def observe(self, duration, stats):
+        for number, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[number] += 1
+        self.count += 1
+        self.duration += duration
+        self.queries += stats.queries
+        self.db_time += stats.db_time
+        self.template_time += stats.template_time
+        self.cache_hits += stats.cache_hits
+        self.cache_misses += stats.cache_misses
+
+
+# Имя счётчика в /metrics/, поле ViewMetrics и описание.
+TOTALS = (
+    ('yatube_db_queries_total', 'queries', 'Запросов к базе'),
+    ('yatube_db_duration_seconds_total', 'db_time', 'Время в базе'),
+    ('yatube_template_duration_seconds_total', 'template_time',
+     'Время рендеринга шаблонов'),
+    ('yatube_cache_hits_total', 'cache_hits', 'Попаданий в кэш'),
+    ('yatube_cache_misses_total', 'cache_misses', 'Промахов кэша'),
+)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, duration, stats):
+        with self._lock:
+            metrics = self._views.get(view)
+            if metrics is None:
+                metrics = self._views[view] = ViewMetrics()
+            metrics.observe(duration, stats)
+
+    def clear(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            name = 'yatube_request_duration_seconds'
+            lines = [
+                f'# HELP {name} Длительность запроса по имени URL',
+                f'# TYPE {name} histogram',
+            ]
+            for view, metrics in views:
+                label = f'view="{view}"'
+                for bound, count in zip(BUCKETS, metrics.buckets):
+                    lines.append(
+                        f'{name}_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(
+                    f'{name}_bucket{{{label},le="+Inf"}} {metrics.count}')
+                lines.append(f'{name}_sum{{{label}}} {metrics.duration}')
+                lines.append(f'{name}_count{{{label}}} {metrics.count}')
+            for name, field, help_text in TOTALS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for view, metrics in views:
+                    value = getattr(metrics, field)
+                    lines.append(f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def check_access(request):
+    allowed = settings.METRICS_ALLOWED_IPS
+    if not (request.user.is_staff
+            or request.META.get('REMOTE_ADDR') in allowed):
+        raise Http404
+
+
+def metrics_view(request):
+    check_access(request)
+    return HttpResponse(
+        registry.render(), content_type='text/plain; version=0.0.4')
+
+
+def queries_view(request):
+    """Отпечатки запросов к базе, самые дорогие по суммарному времени."""
+    check_access(request)
+    return HttpResponse(
+        query_log.render(), content_type='text/plain; charset=utf-8')
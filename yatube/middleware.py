@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, page_cache, profiler, query_log, routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    """
+    Замеряет каждый запрос: время в базе и число запросов, время
+    шаблонов, попадания в кэш. Итоги уходят в заголовок Server-Timing
+    и в гистограммы yatube.metrics по имени URL.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with metrics.collect() as stats, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.record_query))
+            started = time.perf_counter()
+            response = self.get_response(request)
+            duration = time.perf_counter() - started
+        metrics.registry.observe(url_name(request), duration, stats)
+        response['Server-Timing'] = stats.server_timing(duration)
+        return response
+
+
+class Profile:
+    __slots__ = ('thread_id', 'started', 'queries')
+
+    def __init__(self):
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.queries = []
+
+
+def log_query(request, execute, sql, params, many, context):
+    profile = getattr(request, 'profile', None)
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append({
+            'sql': sql,
+            'ms': round((time.perf_counter() - started) * 1000, 3),
+        })
+
+
+class ProfilerMiddleware:
+    """
+    Снимает стеки у доли запросов (PROFILER_SAMPLE_RATE, не больше
+    PROFILER_MAX_PER_MINUTE в минуту) и сохраняет профиль тех, что
+    дольше PROFILER_THRESHOLD_MS. Без PROFILER_ENABLED отключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = profiler.Sampler(settings.PROFILER_INTERVAL_MS / 1000)
+        self.budget = profiler.MinuteBudget(settings.PROFILER_MAX_PER_MINUTE)
+
+    def __call__(self, request):
+        request.profile = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(partial(log_query, request)))
+            response = self.get_response(request)
+        profile = request.profile
+        if profile is not None:
+            stacks = self.sampler.stop(profile.thread_id)
+            duration = time.perf_counter() - profile.started
+            if duration * 1000 >= settings.PROFILER_THRESHOLD_MS:
+                profiler.write_profile(
+                    settings.PROFILER_DIR, url_name(request), duration,
+                    stacks, {
+                        'path': request.get_full_path(),
+                        'method': request.method,
+                        'status': response.status_code,
+                        'queries': profile.queries,
+                    })
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        names = settings.PROFILER_URL_NAMES
+        if names and url_name(request) not in names:
+            return None
+        if random.random() >= settings.PROFILER_SAMPLE_RATE:
+            return None
+        if not self.budget.take():
+            return None
+        request.profile = Profile()
+        self.sampler.start(request.profile.thread_id)
+        return None
+
+
+class QueryLogMiddleware:
+    """
+    Копит статистику запросов к базе по отпечаткам и имени URL и
+    пишет медленные запросы в лог. Отключается QUERY_LOG_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_LOG_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        wrapper = partial(query_log.record, partial(url_name, request))
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(wrapper))
+            return self.get_response(request)
+
+
+class ReplicaMiddleware:
+    """
+    Безопасные запросы читают из реплик, остальные — из основной базы.
+    Успешный небезопасный запрос ставит cookie REPLICA_PIN_COOKIE: пока
+    она жива, сессия читает из основной базы и видит свои записи даже
+    при отставании реплик. Без DATABASE_REPLICAS отключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = (request.method in SAFE_METHODS
+                    and settings.REPLICA_PIN_COOKIE not in request.COOKIES)
+        with routers.reading_from_replicas(replicas):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+        return response
+
+
+class PageCacheMiddleware:
+    """
+    Отдаёт анонимам целые страницы из кэша yatube.page_cache и кладёт
+    туда страницы, помеченные тегами. Запросы с cookie сессии идут мимо
+    кэша. Без PAGE_CACHE_ENABLED отключается.
+
+    Промах собирается из основной базы: страница ляжет под текущие
+    версии тегов, и собранная с отстающей реплики жила бы до истечения.
+    Попадания в базу не ходят, так что реплики разгружает сам кэш.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PAGE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if page_cache.cacheable(request):
+            with routers.reading_from_replicas(False):
+                response = self.get_response(request)
+        else:
+            response = self.get_response(request)
+        if page_cache.store(request, response):
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not page_cache.cacheable(request):
+            return None
+        response = page_cache.fetch(request)
+        if response is not None:
+            response['X-Page-Cache'] = 'hit'
+        return response
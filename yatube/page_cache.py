@@ -0,0 +1,91 @@
+"""
+Кэш целых страниц для анонимов с инвалидацией по тегам.
+
+Представление помечает запрос тегами (tag()): какие посты, авторы и
+группы попали на страницу. У каждого тега в кэше есть версия. Страница
+хранится вместе с версиями своих тегов на момент записи и считается
+устаревшей, если хоть одна из них с тех пор сменилась, поэтому purge()
+сбрасывает ровно те страницы, где виден изменившийся объект. Теги
+уходят и в заголовок Surrogate-Key для кэша перед сайтом.
+
+Страница, собранная одновременно с purge() своих тегов, может попасть в
+кэш устаревшей; такие записи живут не дольше PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+TAG_KEY = 'page:tag:{}'
+PAGE_KEY = 'page:{}'
+
+
+def tag(request, *tags):
+    if not hasattr(request, 'cache_tags'):
+        request.cache_tags = set()
+    request.cache_tags.update(tags)
+
+
+def purge(*tags):
+    for name in tags:
+        key = TAG_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Версии нет — страниц с этим тегом в кэше тоже не осталось.
+            pass
+
+
+def tag_versions(tags):
+    keys = [TAG_KEY.format(name) for name in tags]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Начальная версия от времени: после вытеснения ключа она не
+        # совпадёт с версией, записанной в старых страницах.
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        versions.update(cache.get_many(missing))
+    return versions
+
+
+def page_key(request):
+    path = f'{request.get_host()}{request.get_full_path()}'
+    return PAGE_KEY.format(hashlib.md5(path.encode()).hexdigest())
+
+
+def cacheable(request):
+    """Анонимный запрос на чтение: без cookie сессии."""
+    return (request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+def fetch(request):
+    """Свежая страница из кэша или None."""
+    entry = cache.get(page_key(request))
+    if entry is None:
+        return None
+    response, versions = entry
+    if cache.get_many(list(versions)) != versions:
+        return None
+    last_modified = response.get('Last-Modified')
+    return get_conditional_response(
+        request, etag=response.get('ETag'),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response)
+
+
+def store(request, response):
+    tags = getattr(request, 'cache_tags', None)
+    if not (tags and request.method == 'GET' and cacheable(request)
+            and response.status_code == 200 and not response.streaming
+            and not response.cookies):
+        return False
+    response['Surrogate-Key'] = ' '.join(sorted(tags))
+    cache.set(
+        page_key(request), (response, tag_versions(tags)),
+        settings.PAGE_CACHE_TIMEOUT)
+    return True
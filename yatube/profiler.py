@@ -0,0 +1,112 @@
+"""
+Выборочный профилировщик медленных запросов.
+
+Для профилируемого запроса фоновый поток раз в PROFILER_INTERVAL_MS
+снимает стек его потока из sys._current_frames(). Если запрос оказался
+дольше PROFILER_THRESHOLD_MS, стеки пишутся в PROFILER_DIR в свёрнутом
+формате (collapsed stacks), который понимают flamegraph.pl и
+speedscope, а рядом — JSON с именем URL и журналом запросов к базе.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def frame_name(frame):
+    module = frame.f_globals.get('__name__', '?')
+    return f'{module}:{frame.f_code.co_name}'
+
+
+def collapse(frame):
+    """Стек от корня к листу через «;», как в flamegraph.pl."""
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """Один поток на процесс снимает стеки всех профилируемых потоков."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        stacks = Counter()
+        with self._lock:
+            self._targets[thread_id] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='profiler-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return stacks
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._targets.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            # Событие сбрасывается до проверки, чтобы не проспать start().
+            self._wakeup.clear()
+            with self._lock:
+                targets = list(self._targets.items())
+            if not targets:
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, stacks in targets:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stacks[collapse(frame)] += 1
+            time.sleep(self.interval)
+
+
+class MinuteBudget:
+    """Не больше limit разрешений за календарную минуту."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._minute = None
+        self._used = 0
+
+    def take(self):
+        minute = int(time.time() // 60)
+        with self._lock:
+            if minute != self._minute:
+                self._minute, self._used = minute, 0
+            if self._used >= self.limit:
+                return False
+            self._used += 1
+            return True
+
+
+def write_profile(directory, view, duration, stacks, meta):
+    """Пишет .folded и .json, возвращает путь к .folded."""
+    os.makedirs(directory, exist_ok=True)
+    safe = re.sub(r'[^\w.-]', '_', view)
+    base = os.path.join(
+        directory,
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{safe}-{duration * 1000:.0f}ms'
+    )
+    with open(f'{base}.folded', 'w', encoding='utf-8') as stream:
+        for stack, count in stacks.most_common():
+            stream.write(f'{view};{stack} {count}\n')
+    with open(f'{base}.json', 'w', encoding='utf-8') as stream:
+        json.dump(
+            {'view': view, 'duration_ms': round(duration * 1000, 1),
+             'samples': sum(stacks.values()), **meta},
+            stream, ensure_ascii=False, indent=2
+        )
+    return f'{base}.folded'
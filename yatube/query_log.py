@@ -0,0 +1,155 @@
+"""
+Журнал запросов к базе по отпечаткам.
+
+Отпечаток — SQL без значений: литералы и параметры заменены на «?»,
+списки IN (...) свёрнуты, поэтому все вызовы одного места в ORM
+попадают в одну строку. Для каждой пары (имя URL, отпечаток) копятся
+число вызовов, суммарное время и окно последних длительностей для
+p95. Запросы дольше QUERY_LOG_SLOW_MS пишутся в логгер
+yatube.slow_queries отпечатком, без значений, вместе с планом EXPLAIN.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PARAM = re.compile(r'%s|\?')
+IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+
+_explaining = ContextVar('explaining', default=False)
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(sql):
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = PARAM.sub('?', sql)
+    sql = IN_LIST.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class QueryStats:
+    __slots__ = ('count', 'total', 'durations')
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.durations = deque(maxlen=window)
+
+    def observe(self, duration):
+        self.count += 1
+        self.total += duration
+        self.durations.append(duration)
+
+    @property
+    def p95(self):
+        durations = sorted(self.durations)
+        return durations[math.ceil(len(durations) * 0.95) - 1]
+
+
+class QueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._explained = {}
+
+    def observe(self, view, sql, duration):
+        key = (view, fingerprint(sql))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(
+                    settings.QUERY_LOG_WINDOW)
+            stats.observe(duration)
+
+    def should_explain(self, sql):
+        # Один и тот же медленный запрос объясняется не чаще раза в
+        # минуту, чтобы EXPLAIN сам не нагружал базу.
+        key = fingerprint(sql)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained.get(key, -60) < 60:
+                return False
+            self._explained[key] = now
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+            self._explained.clear()
+
+    def top(self, limit=50):
+        """Самые дорогие по суммарному времени отпечатки."""
+        with self._lock:
+            rows = [
+                (view, sql, stats.count, stats.total, stats.p95)
+                for (view, sql), stats in self._stats.items()
+            ]
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows[:limit]
+
+    def render(self, limit=50):
+        lines = ['view\tcount\ttotal_ms\tp95_ms\tfingerprint']
+        for view, sql, count, total, p95 in self.top(limit):
+            lines.append('\t'.join((
+                view, str(count), f'{total * 1000:.2f}',
+                f'{p95 * 1000:.2f}', sql,
+            )))
+        return '\n'.join(lines) + '\n'
+
+
+query_log = QueryLog()
+
+
+def explain(connection, sql, params):
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    token = _explaining.set(True)
+    try:
+        with connection.cursor() as cursor:
+            prefix = connection.ops.explain_query_prefix()
+            cursor.execute(f'{prefix} {sql}', params)
+            plan = '\n'.join(
+                ' '.join(map(str, row)) for row in cursor.fetchall())
+            # Планы PostgreSQL и MySQL подставляют значения в условия.
+            return STRING.sub('?', plan)
+    except Exception as error:
+        return f'EXPLAIN не выполнен: {type(error).__name__}'
+    finally:
+        _explaining.reset(token)
+
+
+def record(view, execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper(), view — имя URL."""
+    if _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        name = view()
+        query_log.observe(name, sql, duration)
+        if duration * 1000 >= settings.QUERY_LOG_SLOW_MS:
+            plan = None
+            if (settings.QUERY_LOG_EXPLAIN and not many
+                    and query_log.should_explain(sql)):
+                plan = explain(context['connection'], sql, params)
+            # В лог идёт только отпечаток: параметры и литералы могут
+            # нести адреса почты, хэши паролей и ключи сессий.
+            logger.warning(
+                'Медленный запрос %.1f мс в %s: %s%s',
+                duration * 1000, name, fingerprint(sql),
+                f'\nEXPLAIN:\n{plan}' if plan else ''
+            )
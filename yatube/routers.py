@@ -0,0 +1,49 @@
+"""
+Чтение из реплик.
+
+Запись всегда идёт в default. Чтение уходит в одну из реплик
+DATABASE_REPLICAS только внутри reading_from_replicas(): его включает
+ReplicaMiddleware для безопасных запросов сессий, которые недавно
+ничего не писали. Вне запросов (команды, тесты, фоновые задачи) всё
+читается из основной базы.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Сессии читаются из основной базы: реплика может ещё не знать о
+# только что созданной сессии, и пользователь окажется разлогинен.
+PRIMARY_APPS = frozenset({'sessions'})
+
+_use_replicas = ContextVar('use_replicas', default=False)
+
+
+@contextmanager
+def reading_from_replicas(enabled=True):
+    token = _use_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replicas.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not _use_replicas.get()
+                or model._meta.app_label in PRIMARY_APPS):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты из них можно смешивать.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики вместе с данными.
+        return db == 'default'
@@ -35,7 +35,8 @@ ALLOWED_HOSTS = [
 INSTALLED_APPS = [
     'about',
     'users',
-    'posts',
+    'posts.apps.PostsConfig',
+    'yatube.apps.YatubeConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -47,6 +48,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.MetricsMiddleware',
+    'yatube.middleware.ProfilerMiddleware',
+    'yatube.middleware.QueryLogMiddleware',
+    'yatube.middleware.ReplicaMiddleware',
+    'yatube.middleware.PageCacheMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,7 +71,7 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.template_backends.MeteredDjangoTemplates',
         'DIRS': ['templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -82,17 +88,55 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Сколько запросов один процесс ASGI (yatube/asgi.py) выполняет
+# одновременно; остальные соединения ждут в цикле событий.
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 16))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLITE_PRODUCTION=1 включает режим для боевого SQLite: WAL и другие
+# PRAGMA из SQLITE_PRAGMAS на каждом соединении (yatube/db.py) и
+# постоянные соединения вместо открытия базы на каждый запрос.
+SQLITE_PRODUCTION = os.environ.get('SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600 if SQLITE_PRODUCTION else 0,
     }
 }
 
+# Реплики для чтения: REPLICA_DATABASES=/srv/replica1.sqlite3,... Каждая
+# становится псевдонимом replica_N, и GET-запросы читают из случайной
+# реплики (yatube/routers.py). Копии SQLite обновляет sync_replicas.
+# После успешного POST сессия REPLICA_PIN_SECONDS секунд читает из
+# основной базы, чтобы сразу увидеть свою запись.
+REPLICA_DATABASES = [
+    name for name in os.environ.get('REPLICA_DATABASES', '').split(',')
+    if name
+]
+DATABASE_REPLICAS = []
+for number, name in enumerate(REPLICA_DATABASES, start=1):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'], NAME=name, TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+REPLICA_PIN_COOKIE = 'read_primary'
+REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -149,8 +193,176 @@ EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# Uploads
+
+# Загрузки сразу пишутся во временный файл, память на них не тратится.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedUploadHandler']
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+POST_IMAGE_MAX_SIDE = 4096
+
+# Thumbnails
+
+# Миниатюры картинок постов делает фоновый воркер:
+# python manage.py generate_thumbnails --watch
+POST_THUMBNAIL_GEOMETRY = '960x339'
+# После стольких неудач подряд картинка выпадает из очереди воркера;
+# вернуть её: generate_thumbnails --retry-failed.
+POST_THUMBNAIL_MAX_ATTEMPTS = 3
+
+# Ширины и форматы адаптивных копий картинки в порядке предпочтения;
+# форматы без поддержки в Pillow пропускаются. Ширины больше исходника
+# заменяются одной копией в его размер.
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = ('avif', 'webp', 'jpeg')
+
+# Cache
+# CACHE_BACKEND: locmem (по умолчанию, у каждого процесса свой кэш),
+# sqlite или file (общий для процессов одной машины), memcached или
+# полный путь к классу бэкенда, например django_redis.cache.RedisCache.
+# CACHE_LOCATION: файл, каталог или адрес сервера кэша.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'sqlite': 'yatube.cache_backends.SQLiteCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+}
+
+CACHE_LOCATIONS = {
+    'sqlite': os.path.join(BASE_DIR, 'cache.sqlite3'),
+    'file': os.path.join(BASE_DIR, 'cache'),
+    'memcached': '127.0.0.1:11211',
+}
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_INNER_BACKEND = CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND)
+
+# MAX_ENTRIES понимают только бэкенды, которые сами вытесняют записи.
+# Остальные передают OPTIONS клиенту как есть: memcache.Client упадёт
+# на незнакомом аргументе.
+CULLING_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+    'yatube.cache_backends.SQLiteCache',
+}
+
+CACHE_OPTIONS = {}
+if CACHE_INNER_BACKEND in CULLING_CACHE_BACKENDS:
+    CACHE_OPTIONS['MAX_ENTRIES'] = int(
+        os.environ.get('CACHE_MAX_ENTRIES', 100000))
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # MeteredCache считает попадания для /metrics/ и передаёт
+        # остальное настоящему бэкенду.
+        'BACKEND': 'yatube.cache_backends.MeteredCache',
+        'INNER_BACKEND': CACHE_INNER_BACKEND,
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', CACHE_LOCATIONS.get(CACHE_BACKEND, '')),
+        'OPTIONS': CACHE_OPTIONS,
     }
 }
+
+# Сколько секунд живут страницы лент и даты для Last-Modified, закэшированные
+# под версией ленты. Версия сбрасывается при записи, но с locmem новая
+# версия не доходит до других процессов (воркеров gunicorn, фоновых
+# команд), поэтому там страницы должны истекать быстро.
+FEED_CACHE_TIMEOUT = int(os.environ.get(
+    'FEED_CACHE_TIMEOUT', 30 if CACHE_BACKEND == 'locmem' else 60 * 60))
+
+# Sessions
+# SESSION_BACKEND: db (по умолчанию), cached_db (читается из кэша, пишется
+# и в кэш, и в базу), cache (только кэш, пропадает при вытеснении) или
+# signed_cookies (данные в подписанной cookie, без базы и кэша).
+# cached_db и cache с locmem не видят сессии других процессов — им нужен
+# общий CACHE_BACKEND. Сравнить: manage.py benchmark_sessions.
+
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'db')
+SESSION_ENGINE = SESSION_ENGINES.get(SESSION_BACKEND, SESSION_BACKEND)
+
+# Follow feed
+
+# Авторы, у которых подписчиков не меньше этого числа, не раскладывают
+# посты по лентам подписчиков, а подмешиваются в ленту при чтении. При
+# переходе через порог записи лент автора удаляются или раскладываются
+# заново (posts/feed.py).
+FEED_FANOUT_LIMIT = 1000
+
+# Сколько секунд кэш перед сайтом может отдавать анонимам HTML-ленты без
+# перепроверки (Cache-Control: s-maxage, posts/conditional.py).
+FEED_SHARED_MAX_AGE = int(os.environ.get('FEED_SHARED_MAX_AGE', 60))
+
+# PAGE_CACHE_ENABLED=1 включает кэш целых страниц лент для анонимов
+# (yatube/page_cache.py). Страницы сбрасываются по тегам при записи, а
+# PAGE_CACHE_TIMEOUT ограничивает жизнь записи на случай гонок.
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED') == '1'
+PAGE_CACHE_TIMEOUT = 300
+
+# Search
+
+# Полнотекстовый поиск по постам и комментариям: SQLite FTS5 или
+# posts.search.LikeSearch (icontains без индекса) для других баз.
+SEARCH_BACKEND = os.environ.get(
+    'SEARCH_BACKEND', 'posts.search.SQLiteSearch')
+
+# Metrics
+
+# /metrics/ открыт сотрудникам (is_staff) и адресам из METRICS_ALLOWED_IPS,
+# например серверу Prometheus. По умолчанию список пуст: за nginx на той
+# же машине REMOTE_ADDR у всех посетителей 127.0.0.1.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+
+# Profiler
+
+# Выборочный профилировщик медленных запросов, включается
+# PROFILER_ENABLED=1. Профилируется доля PROFILER_SAMPLE_RATE запросов
+# к PROFILER_URL_NAMES (пусто — ко всем), но не больше
+# PROFILER_MAX_PER_MINUTE в минуту; в PROFILER_DIR сохраняются только
+# запросы дольше PROFILER_THRESHOLD_MS.
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED') == '1'
+PROFILER_URL_NAMES = [
+    name for name in os.environ.get('PROFILER_URL_NAMES', '').split(',')
+    if name
+]
+PROFILER_SAMPLE_RATE = float(os.environ.get('PROFILER_SAMPLE_RATE', 0.1))
+PROFILER_MAX_PER_MINUTE = int(os.environ.get('PROFILER_MAX_PER_MINUTE', 6))
+PROFILER_THRESHOLD_MS = int(os.environ.get('PROFILER_THRESHOLD_MS', 500))
+PROFILER_INTERVAL_MS = 5
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Query log
+
+# Статистика запросов к базе по отпечаткам SQL на /metrics/queries/,
+# включается QUERY_LOG_ENABLED=1. Запросы дольше QUERY_LOG_SLOW_MS
+# пишутся в логгер yatube.slow_queries отпечатком с планом EXPLAIN;
+# p95 считается по последним QUERY_LOG_WINDOW вызовам.
+QUERY_LOG_ENABLED = os.environ.get('QUERY_LOG_ENABLED') == '1'
+QUERY_LOG_SLOW_MS = int(os.environ.get('QUERY_LOG_SLOW_MS', 100))
+QUERY_LOG_EXPLAIN = True
+QUERY_LOG_WINDOW = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
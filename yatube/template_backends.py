@@ -0,0 +1,21 @@
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+
+class MeteredTemplate(Template):
+    def render(self, context=None, request=None):
+        with metrics.template_timer():
+            return super().render(context, request)
+
+
+class MeteredDjangoTemplates(DjangoTemplates):
+    """Шаблоны Django, время рендеринга которых попадает в метрики."""
+
+    def from_string(self, template_code):
+        return MeteredTemplate(
+            self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return MeteredTemplate(template.template, self)
@@ -4,11 +4,16 @@ from django.conf.urls import handler404, handler500
 from django.conf import settings
 from django.urls import include, path
 
+from .metrics import metrics_view, queries_view
+
 urlpatterns = [
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
+    path('metrics/queries/', queries_view, name='metrics_queries'),
+    path('api/v1/', include('posts.api_urls')),
     path('', include('posts.urls')),
 ]
 